@@ -0,0 +1,488 @@
+// Clientside engine for the Gantt chart, used when make_Gantt.py runs with FUPP_CLIENTSIDE=1
+//
+// The dataset is shipped once in the 'dataset-store' (see encode_dataset in make_Gantt.py): string columns as
+// {values, codes} with one code per row (-1 for missing), Start/Finish as days since 1970-01-01.
+// These functions mirror filter_dataframe, aggregate_and_merge_data, sort_dataframe, apply_level_of_detail,
+// create_gantt_chart and update_summary in make_Gantt.py, which stay the reference; check_clientside_parity.py runs
+// both and compares.
+(function () {
+    var root = typeof window !== 'undefined' ? window : globalThis;
+    var DAY_MS = 86400000;
+
+    // Columns each bar carries once the rows matching the filters are decoded
+    var BAR_COLUMNS = ['Task', 'Phase', 'Department', 'PM', 'PML', 'DM', 'PM1', 'PM2', 'Location', 'Type', 'Tier', 'RolesInfo', 'Start', 'Finish'];
+    var PM_COLUMNS = ['PM', 'PML', 'DM', 'PM1', 'PM2'];
+
+    // Hover text per colouring, as px.timeline writes it for the hover_data/labels in create_gantt_chart
+    var HOVER = {
+        Phase: {
+            name: 'PM',
+            legend: 'Project Phase',
+            template: '<b>%{hovertext}</b><br><br>Project Phase=%{customdata[0]}<br>Start=%{base}<br>Finish=%{x}<br>Department=%{customdata[1]}<br>Location=%{customdata[3]}<br>Type=%{customdata[4]}<br>Tier=%{customdata[5]}<br>Roles=%{customdata[6]}<extra></extra>'
+        },
+        PM: {
+            name: 'Phase',
+            legend: 'Project Manager',
+            template: '<b>%{hovertext}</b><br><br>Start=%{base}<br>Finish=%{x}<br>Project Phase=%{customdata[0]}<br>Department=%{customdata[1]}<br>Location=%{customdata[3]}<br>Type=%{customdata[4]}<br>Tier=%{customdata[5]}<br>PM Roles=%{customdata[6]}<extra></extra>'
+        }
+    };
+
+    function preventUpdate() {
+        return root.dash_clientside.PreventUpdate;
+    }
+
+    // Function to read one cell, decoding dictionary-encoded strings
+    function cell(data, column, row) {
+        var encoded = data.columns[column];
+        if (encoded.codes) {
+            var code = encoded.codes[row];
+            return code < 0 ? null : encoded.values[code];
+        }
+        var value = encoded[row];
+        return value === undefined ? null : value;
+    }
+
+    // Function to build a row test for 'column is one of selected', checked once per distinct value
+    function isin(data, column, selected) {
+        var encoded = data.columns[column];
+        if (encoded.codes) {
+            var allowed = encoded.values.map(function (value) { return selected.indexOf(value) !== -1; });
+            return function (row) { return encoded.codes[row] >= 0 && allowed[encoded.codes[row]]; };
+        }
+        return function (row) { return selected.indexOf(encoded[row]) !== -1; };
+    }
+
+    // Same selections and the same order of tests as filter_dataframe, returns the matching row numbers
+    function filterRows(data, departments, tiers, locations, types, stages, categories) {
+        var tests = [];
+        if (categories && categories.length) tests.push(isin(data, 'Category', categories));
+        if (departments && departments.length) tests.push(isin(data, 'Department', departments));
+        if (locations && locations.length) tests.push(isin(data, 'Location', locations));
+        if (types && types.length) tests.push(isin(data, 'Type', types));
+        var tierNumbers = (tiers || []).map(function (tier) { return parseInt(tier, 10); });
+        if (tierNumbers.length) tests.push(isin(data, 'Tier', tierNumbers));
+        if (stages && stages.length) tests.push(isin(data, 'Phase', stages));
+
+        var rows = [];
+        for (var row = 0; row < data.rows; row++) {
+            var keep = true;
+            for (var t = 0; t < tests.length && keep; t++) keep = tests[t](row);
+            if (keep) rows.push(row);
+        }
+        return rows;
+    }
+
+    function decodeBars(data, rows) {
+        return rows.map(function (row) {
+            var bar = {};
+            BAR_COLUMNS.forEach(function (column) { bar[column] = cell(data, column, row); });
+            return bar;
+        });
+    }
+
+    function minOf(a, b) { return a === null ? b : (b === null || a <= b ? a : b); }
+    function maxOf(a, b) { return a === null ? b : (b === null || a >= b ? a : b); }
+
+    // Same columns as aggregate_and_merge_data: project start/finish and the first start of stages 5, procurement and 3
+    function aggregate(bars) {
+        var projects = {};
+        var stages = {'Stage 5': 'Stage_5_Start', 'Procurement': 'Procurement_Start', 'Stage 3': 'Stage_3_Start'};
+        bars.forEach(function (bar) {
+            var project = projects[bar.Task] || (projects[bar.Task] = {
+                Project_Start: null, Project_Finish: null, Stage_5_Start: null, Procurement_Start: null, Stage_3_Start: null
+            });
+            project.Project_Start = minOf(project.Project_Start, bar.Start);
+            project.Project_Finish = maxOf(project.Project_Finish, bar.Finish);
+            if (stages[bar.Phase]) project[stages[bar.Phase]] = minOf(project[stages[bar.Phase]], bar.Start);
+        });
+        bars.forEach(function (bar) { Object.assign(bar, projects[bar.Task]); });
+        return bars;
+    }
+
+    // Same order as sort_dataframe: descending, ties keep their order, missing values first (last for Task)
+    function sortBars(bars, column) {
+        var nullsFirst = column !== 'Task';
+        return bars.map(function (bar, i) { return [bar, i]; }).sort(function (a, b) {
+            var x = a[0][column], y = b[0][column];
+            if (x === null || y === null) {
+                if (x === y) return a[1] - b[1];
+                return (x === null) === nullsFirst ? -1 : 1;
+            }
+            if (x !== y) return x > y ? -1 : 1;
+            return a[1] - b[1];
+        }).map(function (pair) { return pair[0]; });
+    }
+
+    // Function to read a plotly axis value ('YYYY-MM-DD HH:MM:SS.ffff', naive like the dataset) as milliseconds
+    function timestamp(text) {
+        if (typeof text === 'number') return text;
+        var m = /^(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?)?/.exec(String(text));
+        return Date.UTC(+m[1], m[2] - 1, +m[3], +(m[4] || 0), +(m[5] || 0)) + parseFloat(m[6] || 0) * 1000;
+    }
+
+    function visibleBars(bars, range) {
+        if (!range) return bars;
+        var start = timestamp(range[0]), finish = timestamp(range[1]);
+        return bars.filter(function (bar) {
+            return bar.Start !== null && bar.Finish !== null && bar.Finish * DAY_MS >= start && bar.Start * DAY_MS <= finish;
+        });
+    }
+
+    // Phase of the latest-starting bar per group, like sort_values('Start').groupby(...)['Phase'].last()
+    function latestPhases(bars, keyOf) {
+        var order = bars.map(function (bar, i) { return i; }).sort(function (i, j) {
+            var x = bars[i].Start, y = bars[j].Start;
+            if (x === y) return i - j;
+            if (x === null) return 1;
+            if (y === null) return -1;
+            return x - y;
+        });
+        var latest = {};
+        order.forEach(function (i) {
+            if (bars[i].Phase !== null) latest[keyOf(bars[i])] = bars[i].Phase;
+        });
+        return latest;
+    }
+
+    function rollUpProjects(bars) {
+        var latest = latestPhases(bars, function (bar) { return bar.Task; });
+        var seen = {};
+        return bars.filter(function (bar) {
+            return seen[bar.Task] ? false : (seen[bar.Task] = true);
+        }).map(function (bar) {
+            return Object.assign({}, bar, {Start: bar.Project_Start, Finish: bar.Project_Finish, Phase: latest[bar.Task]});
+        });
+    }
+
+    function rollUpDepartments(bars) {
+        var keyOf = function (bar) { return bar.Department + '\u001f' + bar.Location; };
+        var latest = latestPhases(bars, keyOf);
+        var groups = {};
+        var order = [];
+        bars.forEach(function (bar) {
+            var key = keyOf(bar);
+            var group = groups[key];
+            if (!group) {
+                group = groups[key] = {Department: bar.Department, Location: bar.Location, Start: null, Finish: null, tasks: {}};
+                order.push(group);
+            }
+            group.Start = minOf(group.Start, bar.Start);
+            group.Finish = maxOf(group.Finish, bar.Finish);
+            group.tasks[bar.Task] = true;
+        });
+        return order.map(function (group) {
+            var projects = Object.keys(group.tasks).length;
+            return {
+                Department: group.Department, Location: group.Location, Start: group.Start, Finish: group.Finish,
+                Phase: latest[keyOf(group)] === undefined ? null : latest[keyOf(group)],
+                Task: group.Department + ' / ' + group.Location, Type: projects + ' projects',
+                PM: 'Unknown PM', Tier: '', RolesInfo: ''
+            };
+        });
+    }
+
+    // Same levels and limits as apply_level_of_detail
+    function levelOfDetail(bars, range, settings) {
+        if (bars.length <= settings.max_phase_bars) return [bars, 'phases'];
+        var phases = visibleBars(bars, range);
+        if (phases.length <= settings.max_phase_bars) return [phases, 'visible phases'];
+        var projects = visibleBars(rollUpProjects(bars), range);
+        if (projects.length <= settings.max_project_bars) return [projects, 'projects'];
+        return [visibleBars(rollUpDepartments(bars), range), 'departments'];
+    }
+
+    function isoDate(days) {
+        return days === null ? null : new Date(days * DAY_MS).toISOString().slice(0, 19);
+    }
+
+    function today() {
+        var now = new Date();
+        var pad = function (n) { return (n < 10 ? '0' : '') + n; };
+        return now.getFullYear() + '-' + pad(now.getMonth() + 1) + '-' + pad(now.getDate());
+    }
+
+    // Same traces and layout as create_gantt_chart followed by add_current_date_line
+    function ganttFigure(bars, colorColumn, taskOrder, settings, height) {
+        var byPm = colorColumn === 'PM';
+        var hover = HOVER[byPm ? 'PM' : 'Phase'];
+        // Values missing from the colour map take the next template colour, as px does
+        var colors = Object.assign({}, byPm ? settings.pm_colors : settings.phase_colors);
+        var traces = {};
+        var data = [];
+        bars.forEach(function (bar) {
+            var name = bar[colorColumn];
+            var trace = traces[name];
+            if (!trace) {
+                if (!(name in colors)) colors[name] = settings.colorway[Object.keys(colors).length % settings.colorway.length];
+                trace = traces[name] = {
+                    alignmentgroup: 'True', base: [], customdata: [], hovertemplate: hover.template, hovertext: [],
+                    legendgroup: name, marker: {color: colors[name], opacity: 0.7, pattern: {shape: ''}}, name: name,
+                    offsetgroup: name, orientation: 'h', showlegend: true, textposition: 'auto', x: [], xaxis: 'x',
+                    y: [], yaxis: 'y', type: 'bar'
+                };
+                data.push(trace);
+            }
+            trace.base.push(isoDate(bar.Start));
+            trace.x.push(bar.Start === null || bar.Finish === null ? null : (bar.Finish - bar.Start) * DAY_MS);
+            trace.y.push(bar.Task);
+            trace.hovertext.push(bar[hover.name]);
+            trace.customdata.push([bar.Phase, bar.Department, bar.PM, bar.Location, bar.Type, bar.Tier, bar.RolesInfo]);
+        });
+
+        var layout = {
+            template: settings.template,
+            xaxis: {anchor: 'y', domain: [0, 1], type: 'date'},
+            // px lists y categories top to bottom, so the axis gets the task order reversed back
+            yaxis: {anchor: 'x', domain: [0, 1], title: {text: 'Projects'}, categoryorder: 'array', categoryarray: taskOrder.slice().reverse()},
+            legend: {title: {text: hover.legend}, tracegroupgap: 0},
+            margin: {t: 60},
+            barmode: 'overlay',
+            shapes: [],
+            annotations: []
+        };
+        if (byPm) {
+            layout.legend.itemclick = false;
+            layout.legend.itemdoubleclick = false;
+        } else {
+            layout.showlegend = false;
+            // Custom legend to the right of the chart, sized relative to the chart height
+            var itemHeight = 15 / height;
+            var space = 15 / height;
+            var x0 = 1.02, blockWidth = 0.03;
+            Object.keys(settings.phase_colors).reverse().forEach(function (label, i) {
+                var color = settings.phase_colors[label];
+                var y = 1 - i * (itemHeight + space);
+                layout.shapes.push({
+                    fillcolor: color, line: {color: color}, type: 'rect', x0: x0, x1: x0 + blockWidth,
+                    xref: 'paper', y0: y, y1: y - itemHeight, yref: 'paper'
+                });
+                layout.annotations.push({
+                    align: 'left', font: {color: 'black', size: 12}, showarrow: false, text: label,
+                    x: x0 + blockWidth + 0.01, xanchor: 'left', xref: 'paper', y: y - (itemHeight / 2),
+                    yanchor: 'middle', yref: 'paper'
+                });
+            });
+            layout.margin.r = 170;
+            Object.assign(layout.legend, {orientation: 'h', yanchor: 'bottom', y: 1.02, xanchor: 'right', x: 1});
+        }
+
+        var date = today();
+        layout.shapes.push({line: {color: 'Black', width: 2}, type: 'line', x0: date, x1: date, y0: 0, y1: 1, yref: 'paper'});
+        layout.annotations.push({
+            bgcolor: 'black', font: {color: 'white'}, opacity: 0.7, showarrow: false, text: 'Today',
+            x: date, xanchor: 'right', y: 1.025, yref: 'paper'
+        });
+        return {data: data, layout: layout};
+    }
+
+    // Function to list the places a search may match a name, like word_suffixes
+    function wordSuffixes(name) {
+        var lower = name.toLowerCase();
+        var suffixes = [lower];
+        var separators = /[\s\-\/&(]+/g;
+        var m;
+        while ((m = separators.exec(lower)) !== null) {
+            var end = m.index + m[0].length;
+            if (end < lower.length) suffixes.push(lower.slice(end));
+        }
+        return suffixes;
+    }
+
+    // Same PM and project checklists as filter_pms_and_projects, applied to the row numbers from filterRows
+    function filterPmsAndProjects(data, rows, pms, filteredProjects) {
+        pms = pms || [];
+        // Filter based on selected PMs (include PM, PML, DM, PM1, PM2)
+        if (pms.length) {
+            var tests = PM_COLUMNS.map(function (column) { return isin(data, column, pms); });
+            rows = rows.filter(function (row) { return tests.some(function (test) { return test(row); }); });
+        }
+        if (pms.indexOf('Unknown PM') !== -1) rows = rows.filter(isin(data, 'PM', ['Unknown PM']));
+        if (filteredProjects && filteredProjects.length) rows = rows.filter(isin(data, 'Task', filteredProjects));
+        return rows;
+    }
+
+    // Totals of the rows like summarize_frame, overall when by is null, otherwise per value of that column
+    function summarize(data, rows, by, settings) {
+        var groups = {};
+        rows.forEach(function (row) {
+            var value = by === null ? '' : cell(data, by, row);
+            if (value === null) return;
+            var group = groups[value] || (groups[value] = {tasks: {}, projects: 0, phases: 0, phase_days: 0});
+            var task = cell(data, 'Task', row);
+            if (!group.tasks[task]) {
+                group.tasks[task] = true;
+                group.projects += 1;
+            }
+            group.phases += 1;
+            var start = cell(data, 'Start', row), finish = cell(data, 'Finish', row);
+            if (start !== null && finish !== null) group.phase_days += finish - start;
+        });
+        var totals = function (group) {
+            group = group || {projects: 0, phases: 0, phase_days: 0};
+            return {projects: group.projects, phases: group.phases, phase_months: group.phase_days / settings.days_per_month};
+        };
+        if (by === null) return [['All', totals(groups[''])]];
+        return Object.keys(groups).sort().map(function (value) { return [value, totals(groups[value])]; });
+    }
+
+    function htmlComponent(type, props) {
+        return {props: props, type: type, namespace: 'dash_html_components'};
+    }
+
+    // One row of the summary table, like summary_row
+    function summaryRow(label, totals, style) {
+        var cells = [label, totals.projects, totals.phases, totals.phase_months.toFixed(1)];
+        return htmlComponent('Tr', {
+            children: cells.map(function (value) { return htmlComponent('Td', {children: value, style: {padding: '0 4px'}}); }),
+            style: style || null
+        });
+    }
+
+    // Projects matching the filters and PMs, sorted like get_project_index
+    function projectNames(data, departments, locations, types, tiers, stages, pms, categories) {
+        var rows = filterRows(data, departments, tiers, locations, types, stages, categories);
+        if (pms && pms.length) rows = rows.filter(isin(data, 'PM', pms));
+        var names = {};
+        rows.forEach(function (row) { names[cell(data, 'Task', row)] = true; });
+        return Object.keys(names).sort();
+    }
+
+    // Same ranking as search_project_index: name prefix, then word prefix, then any substring
+    function searchNames(names, query, limit) {
+        query = (query || '').trim().toLowerCase();
+        if (!query) return names.slice(0, limit);
+        var lower = names.map(function (name) { return name.toLowerCase(); });
+        var found = {};
+        var ranked = [];
+        names.forEach(function (name, position) {
+            if (wordSuffixes(name).some(function (suffix) { return suffix.indexOf(query) === 0; })) {
+                found[position] = true;
+                ranked.push(position);
+            }
+        });
+        ranked = ranked.sort(function (a, b) {
+            return (lower[a].indexOf(query) !== 0) - (lower[b].indexOf(query) !== 0) || a - b;
+        }).slice(0, limit);
+        for (var position = 0; position < names.length && ranked.length < limit; position++) {
+            if (!found[position] && lower[position].indexOf(query) !== -1) ranked.push(position);
+        }
+        return ranked.map(function (position) { return names[position]; });
+    }
+
+    // Chart height and style for the rows drawn, like get_graph_container_height and graph_container_style
+    function containerHeight(rowCount) {
+        return Math.max(850, rowCount * 25);
+    }
+
+    function containerStyle(height) {
+        return {height: height + 'px', backgroundColor: '#4396a7', zIndex: '2'};
+    }
+
+    function triggeredByZoom() {
+        var context = root.dash_clientside.callback_context;
+        var triggered = (context && context.triggered) || [];
+        return triggered.length > 0 && triggered[0].prop_id.split('.')[0] === 'zoom-store';
+    }
+
+    // Callbacks, named after the server callbacks they replace; the dataset arrives as the last argument and the
+    // data callbacks get the portfolio name first, which the dataset store already stands for
+    var fupp = {
+        search_projects: function (datasetName, searchValue, departments, locations, types, tiers, stages, pms, categories, selectedProjects, dataset) {
+            var names = projectNames(dataset, departments, locations, types, tiers, stages, pms, categories);
+            var matches = searchNames(names, searchValue, dataset.settings.search_limit);
+            var selected = selectedProjects || [];
+            return selected.concat(matches.filter(function (name) { return selected.indexOf(name) === -1; }))
+                .map(function (name) { return {label: name, value: name}; });
+        },
+
+        update_zoom: function (relayoutData, dataset) {
+            if (!relayoutData) throw preventUpdate();
+            if (relayoutData['xaxis.autorange']) return null;
+            if ('xaxis.range[0]' in relayoutData) return {range: [relayoutData['xaxis.range[0]'], relayoutData['xaxis.range[1]']]};
+            if ('xaxis.range' in relayoutData) return {range: relayoutData['xaxis.range'].slice()};
+            throw preventUpdate();
+        },
+
+        ensure_strategies_and_plans: function (selectedStages, currentValue, dataset) {
+            if (selectedStages.indexOf('Strategies and Plans') === -1) return selectedStages.concat(['Strategies and Plans']);
+            return selectedStages;
+        },
+
+        update_pm_checklist: function (datasetName, departments, locations, types, tiers, stages, categories, dataset) {
+            var rows = filterRows(dataset, departments, tiers, locations, types, stages, categories);
+            var names = {};
+            PM_COLUMNS.forEach(function (column) {
+                rows.forEach(function (row) {
+                    var name = cell(dataset, column, row);
+                    if (name !== null) names[name] = true;
+                });
+            });
+            return Object.keys(names).sort().map(function (pm) { return {label: pm, value: pm}; });
+        },
+
+        // The server answers this from the summary cube, the browser already holds the rows
+        update_summary: function (datasetName, departments, locations, types, tiers, stages, pms, selectedProjects, categories, dataset) {
+            var rows = filterRows(dataset, departments, tiers, locations, types, stages, categories);
+            rows = filterPmsAndProjects(dataset, rows, pms, selectedProjects);
+            var header = htmlComponent('Tr', {
+                children: ['', 'Projects', 'Phases', 'Phase-months'].map(function (title) {
+                    return htmlComponent('Th', {children: title, style: {padding: '0 4px'}});
+                })
+            });
+            var tableRows = [header];
+            [null, 'Department', 'Phase'].forEach(function (by) {
+                summarize(dataset, rows, by, dataset.settings).forEach(function (pair) {
+                    tableRows.push(summaryRow(pair[0], pair[1], by === null ? {fontWeight: 'bold'} : null));
+                });
+            });
+            return htmlComponent('Table', {children: tableRows});
+        },
+
+        // Returns the figure and the chart style, sized for the rows drawn at the chosen level of detail
+        update_graph: function (datasetName, colorColumn, departments, locations, types, tiers, stages, pms,
+                                nClicks, sortColumn, filteredProjects, categories, zoomData, dataset) {
+            var settings = dataset.settings;
+            if (!locations || !locations.length) return [{data: [], layout: {template: settings.template}}, containerStyle(containerHeight(0))];
+
+            var rows = filterRows(dataset, departments, tiers, locations, types, stages, categories);
+            rows = filterPmsAndProjects(dataset, rows, pms, filteredProjects);
+
+            var sorted = sortBars(aggregate(decodeBars(dataset, rows)), sortColumn);
+
+            var range = zoomData ? zoomData.range : null;
+            var detail = levelOfDetail(sorted, range, settings);
+            var bars = detail[0], level = detail[1];
+            if (level === 'phases' && triggeredByZoom()) {
+                // The full chart is already drawn, plotly zooms it on the client
+                throw preventUpdate();
+            }
+            if (!bars.length) return [{data: [], layout: {template: settings.template, title: {text: 'No Data to Display'}}}, containerStyle(containerHeight(0))];
+
+            var taskOrder = [];
+            var seen = {};
+            bars.forEach(function (bar) {
+                if (!seen[bar.Task]) {
+                    seen[bar.Task] = true;
+                    taskOrder.push(bar.Task);
+                }
+            });
+            taskOrder.reverse();
+
+            var height = containerHeight(taskOrder.length);
+            var figure = ganttFigure(bars, colorColumn, taskOrder, settings, height);
+            figure.layout.xaxis.rangeslider = {visible: nClicks % 2 === 1};
+            if (level !== 'phases') {
+                if (range) figure.layout.xaxis.range = range;
+                if (level === 'projects' || level === 'departments') {
+                    figure.layout.title = {text: 'One bar per ' + (level === 'projects' ? 'project' : 'Department / Location') + ', zoom in for phase detail'};
+                }
+            }
+            return [figure, containerStyle(height)];
+        }
+    };
+
+    root.dash_clientside = Object.assign({}, root.dash_clientside, {fupp: fupp});
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = fupp;
+    }
+})();
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Measures how long a fresh make_Gantt.py process takes to import and to answer its first requests
+# The warm-up is measured the way a server process runs it, by calling make_Gantt.warm_up() after the import
+# Exits with status 1 when the median import time or time to first response is over its budget
+
+# Runs in a fresh interpreter for every measurement
+PROBE = r'''
+import json, time
+started = time.perf_counter()
+import make_Gantt
+imported = time.perf_counter()
+make_Gantt.warm_up()
+warmed = time.perf_counter()
+client = make_Gantt.app.server.test_client()
+view = make_Gantt.DEFAULT_VIEW
+filters = [
+    ('department-checklist-items', 'value', view['departments']),
+    ('location-checklist-items', 'value', view['locations']),
+    ('type-checklist-items', 'value', view['types']),
+    ('tier-checklist-items', 'value', view['tiers']),
+    ('stage-checklist-items', 'value', view['stages']),
+]
+
+def update(outputs, inputs):
+    response = client.post('/_dash-update-component', json={
+        'output': '..' + '...'.join(f'{i}.{p}' for i, p in outputs) + '..',
+        'outputs': [{'id': i, 'property': p} for i, p in outputs],
+        'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+        'changedPropIds': [],
+        'state': [],
+    })
+    assert response.status_code == 200
+    return response.get_json()['response']
+
+assert client.get('/_dash-layout').status_code == 200
+layout = time.perf_counter()
+# The same chain the browser runs on page load: portfolio -> chart (with its height)
+response = update([('dataset-name-store', 'data'), ('dataset-store', 'data'), ('last-updated', 'children'),
+                   ('department-checklist-items', 'options'), ('department-checklist-items', 'value')],
+                  [('url', 'pathname', '/'), ('url', 'search', '')])
+portfolio = [('dataset-name-store', 'data', response['dataset-name-store']['data'])]
+update([('gantt-chart-placeholder', 'figure'), ('gantt-chart-placeholder', 'style')], portfolio + [
+    ('color-radio-items', 'value', view['color']),
+] + filters + [
+    ('pm-checklist-items', 'value', view['pms']),
+    ('toggle-slider-button', 'n_clicks', 0),
+    ('sort-dropdown', 'value', view['sort']),
+    ('filtered-project-list-checklist', 'value', []),
+    ('category-checklist-items', 'value', view['categories']),
+    ('zoom-store', 'data', None),
+])
+figure = time.perf_counter()
+print('BENCH ' + json.dumps({
+    'import': imported - started,
+    'warm_up': warmed - imported,
+    'layout': layout - started,
+    'first_figure': figure - started,
+}))
+'''
+
+
+def measure(warmup):
+    env = dict(os.environ, FUPP_WARMUP='1' if warmup else '0')
+    result = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    line = [l for l in result.stdout.splitlines() if l.startswith('BENCH ')][-1]
+    return json.loads(line[len('BENCH '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark make_Gantt.py start-up time")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh processes to start per configuration")
+    parser.add_argument('--budget', type=float, default=float(os.environ.get('FUPP_STARTUP_BUDGET', '3.0')),
+                        help="Seconds allowed from process start to the first chart response")
+    parser.add_argument('--import-budget', type=float, default=float(os.environ.get('FUPP_IMPORT_BUDGET', '1.5')),
+                        help="Seconds allowed for importing make_Gantt.py (what a gunicorn worker spawn pays before its warm-up)")
+    args = parser.parse_args()
+
+    over_budget = False
+    for warmup in (False, True):
+        runs = [measure(warmup) for _ in range(args.runs)]
+        medians = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+        label = 'with warm-up' if warmup else 'without warm-up'
+        print(f"{label}: import {medians['import']:.2f}s, warm-up {medians['warm_up']:.2f}s, layout {medians['layout']:.2f}s, "
+              f"first figure {medians['first_figure']:.2f}s (median of {args.runs})")
+        if medians['import'] > args.import_budget:
+            print(f"  import over the {args.import_budget:.2f}s budget")
+            over_budget = True
+        if medians['first_figure'] > args.budget:
+            print(f"  first figure over the {args.budget:.2f}s budget")
+            over_budget = True
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import csv
+import hashlib
+import os
+
+# Columns that identify a row between runs, together with the input it came from
+KEY_COLUMNS = ['Task', 'Phase']
+
+
+# Function to derive the sidecar file names for an output CSV
+def sidecar_paths(output_path):
+    base, _ = os.path.splitext(output_path)
+    return base + '.fingerprints.csv', base + '.changes.csv'
+
+
+# Function to format a value the same way csv.writer does
+def _cell(value):
+    return '' if value is None else str(value)
+
+
+# Function to fingerprint every output row
+# Rows are keyed by (Task, Phase, source, n) where n counts repeats of the same key within one source
+def row_fingerprints(output_rows, header):
+    key_positions = [header.index(column) for column in KEY_COLUMNS]
+    fingerprints = {}
+    rows_by_key = {}
+    seen = {}
+    for source, row in output_rows:
+        base_key = tuple(_cell(row[i]) for i in key_positions) + (source,)
+        seq = seen.get(base_key, 0)
+        seen[base_key] = seq + 1
+        key = base_key + (str(seq),)
+        fingerprints[key] = hashlib.sha1('\x1f'.join(_cell(v) for v in row).encode('utf-8')).hexdigest()
+        rows_by_key[key] = row
+    return fingerprints, rows_by_key
+
+
+# Function to read the fingerprints written by the previous run
+def load_fingerprints(path):
+    fingerprints = {}
+    if not os.path.exists(path):
+        return fingerprints
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip the header
+        for *key, fingerprint in reader:
+            fingerprints[tuple(key)] = fingerprint
+    return fingerprints
+
+
+def write_fingerprints(path, fingerprints):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(KEY_COLUMNS + ['Source', 'Seq', 'Fingerprint'])
+        for key, fingerprint in fingerprints.items():
+            writer.writerow(list(key) + [fingerprint])
+
+
+# Function to compare two fingerprint sets, returns the added, removed and modified keys
+def diff_fingerprints(previous, current):
+    added = [key for key in current if key not in previous]
+    removed = [key for key in previous if key not in current]
+    modified = [key for key in current if key in previous and previous[key] != current[key]]
+    return added, removed, modified
+
+
+# Function to write the change set; removed rows only carry their key columns
+def write_change_set(path, header, rows_by_key, added, removed, modified):
+    key_positions = [header.index(column) for column in KEY_COLUMNS]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Change', 'Source', 'Seq'] + header)
+        for change, keys in (('added', added), ('modified', modified)):
+            for key in keys:
+                writer.writerow([change, key[-2], key[-1]] + list(rows_by_key[key]))
+        for key in removed:
+            row = [''] * len(header)
+            for position, value in zip(key_positions, key):
+                row[position] = value
+            writer.writerow(['removed', key[-2], key[-1]] + row)
+
+
+# Function to remember this run's fingerprints and, when incremental, write the change set against the previous run
+# The fingerprints are refreshed on every run so the next change set is always against the CSV on disk
+# publish(path, write) writes a file so readers never see it half-written (format_txt.publish_atomically)
+def update_change_set(output_rows, header, output_path, publish, incremental=True):
+    fingerprints_path, changes_path = sidecar_paths(output_path)
+    current, rows_by_key = row_fingerprints(output_rows, header)
+    changes = None
+    if incremental:
+        previous = load_fingerprints(fingerprints_path)
+        changes = added, removed, modified = diff_fingerprints(previous, current)
+        publish(changes_path, lambda path: write_change_set(path, header, rows_by_key, added, removed, modified))
+        print(f"Change set written to {changes_path}: {len(added)} added, {len(removed)} removed, {len(modified)} modified")
+    publish(fingerprints_path, lambda path: write_fingerprints(path, current))
+    return changes
@@ -0,0 +1,153 @@
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import plotly
+
+# Checks the clientside engine (assets/clientside_engine.js) against the Python callbacks it mirrors
+# Every scenario runs through both, in node and in make_Gantt.py, and the results must match
+# Exits with status 1 when any scenario differs
+#
+#   python check_clientside_parity.py
+
+ENGINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'clientside_engine.js')
+
+# Runs the engine functions in node, one call per scenario
+DRIVER = r'''
+const fs = require('fs');
+const input = JSON.parse(fs.readFileSync(0, 'utf8'));
+const PreventUpdate = {};
+globalThis.dash_clientside = {PreventUpdate: PreventUpdate, callback_context: {triggered: []}};
+const engine = require(input.engine);
+const results = input.calls.map(([name, args]) => {
+    try {
+        return engine[name](...args, input.dataset);
+    } catch (e) {
+        if (e === PreventUpdate) return {prevent_update: true};
+        throw e;
+    }
+});
+process.stdout.write(JSON.stringify(results));
+'''
+
+ZOOM_RANGES = [None, ['2025-01-01', '2027-06-30 12:00:00.5'], ['2031-03-15 06:30:00', '2033-01-01']]
+SEARCH_QUERIES = [None, '', 't', 'te', ' stage', 'p3', 'zzz']
+
+
+# Function to list the (callback name, arguments) pairs to compare
+def scenarios(mg, lowered_limits):
+    view = mg.DEFAULT_VIEW
+    name = mg.DEFAULT_DATASET
+    data = mg.get_data(name)
+    pms = mg.get_dataset(name).layout_options()['pms']
+    projects = sorted(data['Task'].unique())
+
+    views = [{}] if lowered_limits else [
+        {},
+        {'color': 'PM'},
+        {'departments': []},
+        {'locations': []},
+        {'tiers': ['1']},
+        {'stages': []},
+        {'categories': ['Strategies and Plans']},
+        {'categories': [], 'departments': [], 'types': ['Civil']},
+        {'pms': [option['value'] for option in pms[:2]]},
+        {'pms': ['Unknown PM']},
+        {'projects': projects[:3]},
+        {'n_clicks': 1},
+    ] + [{'sort': sort} for sort in ['Project_Finish', 'Stage_3_Start', 'Procurement_Start', 'Stage_5_Start', 'PM', 'Task']]
+
+    calls = []
+    for preset in views:
+        v = dict(view, projects=[], n_clicks=0)
+        v.update(preset)
+        filters = [v['departments'], v['locations'], v['types'], v['tiers'], v['stages']]
+        calls.append(('update_pm_checklist', [name] + filters + [v['categories']]))
+        calls.append(('update_summary', [name] + filters + [v['pms'], v['projects'], v['categories']]))
+        for query in (SEARCH_QUERIES if not preset else [None]):
+            calls.append(('search_projects', [name, query] + filters + [v['pms'], v['categories'], v['projects']]))
+        for zoom in (ZOOM_RANGES if lowered_limits or not preset else [None]):
+            calls.append(('update_graph', [name, v['color'], v['departments'], v['locations'], v['types'], v['tiers'],
+                                           v['stages'], v['pms'], v['n_clicks'], v['sort'], v['projects'], v['categories'],
+                                           {'range': zoom} if zoom else None]))
+    return calls
+
+
+# Function to run the calls through the Python callbacks, as plain JSON values
+def run_python(mg, calls):
+    results = []
+    for name, args in calls:
+        try:
+            result = getattr(mg, name)(*json.loads(json.dumps(args)))
+        except mg.PreventUpdate:
+            result = {'prevent_update': True}
+        results.append(json.loads(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder)))
+    return results
+
+
+def run_node(dataset, calls):
+    payload = json.dumps({'engine': ENGINE_PATH, 'dataset': dataset, 'calls': calls}, cls=plotly.utils.PlotlyJSONEncoder)
+    result = subprocess.run(['node', '-e', DRIVER], input=payload, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout)
+
+
+# Function to find the first difference between two JSON values, returns its path or None
+def difference(expected, actual, path='$'):
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) and not isinstance(expected, bool):
+        return None if math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-12) else f"{path}: {expected!r} != {actual!r}"
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if expected.keys() != actual.keys():
+            return f"{path}: keys {sorted(expected.keys() ^ actual.keys())} differ"
+        for key in expected:
+            found = difference(expected[key], actual[key], f"{path}.{key}")
+            if found:
+                return found
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{path}: length {len(expected)} != {len(actual)}"
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            found = difference(a, b, f"{path}[{i}]")
+            if found:
+                return found
+        return None
+    return None if expected == actual else f"{path}: {expected!r} != {actual!r}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the clientside engine with the server callbacks")
+    parser.add_argument('--max-bars', type=int, default=40,
+                        help="Bar limit for the level-of-detail pass, low enough for the roll-ups to kick in")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import make_Gantt as mg
+
+    failures = 0
+    total = 0
+    for lowered_limits in (False, True):
+        if lowered_limits:
+            mg.MAX_PHASE_BARS = args.max_bars
+            mg.MAX_PROJECT_BARS = args.max_bars // 4
+            # Figures cached under the normal limits would be served again
+            mg.get_dataset().caches.clear()
+        calls = scenarios(mg, lowered_limits)
+        expected = run_python(mg, calls)
+        actual = run_node(mg.get_client_dataset(mg.get_data()), calls)
+        for (name, call_args), a, b in zip(calls, expected, actual):
+            total += 1
+            found = difference(a, b)
+            if found:
+                failures += 1
+                print(f"MISMATCH {name}{json.dumps(call_args, default=str)[:200]}\n  {found[:300]}")
+
+    print(f"{total - failures}/{total} scenarios match")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
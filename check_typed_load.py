@@ -0,0 +1,75 @@
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import pandas as pd
+
+# Checks that the dashboard prepares the same frame from the typed pickle format_txt.py writes as from the CSV
+# The rows of a formatted_data.csv are written both ways, once as they are and once with the Tier of some
+# projects blanked out, and prepare_data(load_data(...)) must give identical frames for each
+# Exits with status 1 when any case differs
+#
+#   python check_typed_load.py
+
+
+# Function to read the rows of a formatted_data.csv the way format_txt.py collects them
+def read_rows(path):
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return header, [('csv', row) for row in reader]
+
+
+# Function to blank the Tier of the first n projects
+def blank_tiers(header, output_rows, n):
+    task, tier = header.index('Task'), header.index('Tier')
+    projects = list(dict.fromkeys(row[task] for _, row in output_rows))[:n]
+    return [(source, row[:tier] + [''] + row[tier + 1:] if row[task] in projects else row) for source, row in output_rows]
+
+
+# Function to load the rows through the CSV path and through the pickle path, returns the two prepared frames
+def load_both(ft, mg, output_rows, directory):
+    csv_path = os.path.join(directory, 'csv_only', 'formatted_data.csv')
+    typed_path = os.path.join(directory, 'typed', 'formatted_data.csv')
+    for path in (csv_path, typed_path):
+        os.makedirs(os.path.dirname(path))
+        ft.write_csv(path, output_rows)
+    ft.to_typed_frame(output_rows).to_pickle(ft.typed_output_path(typed_path))
+    return mg.prepare_data(mg.load_data(csv_path)), mg.prepare_data(mg.load_data(typed_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the dashboard data loaded from the typed pickle and from the CSV")
+    parser.add_argument('--data', default='formatted_data.csv', help="formatted_data.csv to take the rows from")
+    parser.add_argument('--blank-projects', type=int, default=1, help="Projects whose Tier is blanked in the second case")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import format_txt as ft
+    import make_Gantt as mg
+
+    header, output_rows = read_rows(args.data)
+    if header != ft.HEADER:
+        print(f"{args.data} does not have the columns format_txt.py writes")
+        sys.exit(1)
+
+    failures = 0
+    for name, rows in (('as written', output_rows), ('with blank Tiers', blank_tiers(header, output_rows, args.blank_projects))):
+        with tempfile.TemporaryDirectory() as directory:
+            from_csv, from_pickle = load_both(ft, mg, rows, directory)
+        try:
+            if from_csv.empty:
+                raise AssertionError("the CSV path gave an empty frame")
+            pd.testing.assert_frame_equal(from_pickle, from_csv)
+        except AssertionError as e:
+            failures += 1
+            print(f"MISMATCH {name}: {e}")
+            continue
+        print(f"{name}: {from_csv.shape[0]} rows, Tier {from_csv['Tier'].dtype}, identical")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
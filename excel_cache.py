@@ -0,0 +1,177 @@
+import hashlib
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# Local cache of parsed Excel sheets, keyed on the workbook contents so an
+# unchanged sheet skips the (slow) openpyxl parse entirely.
+CACHE_DIR = os.environ.get('FUPP_CACHE_DIR', '.excel_cache')
+CACHE_MAX_BYTES = int(float(os.environ.get('FUPP_CACHE_MAX_MB', '200')) * 1024 * 1024)
+# Bump this when the way frames are parsed or stored changes
+CACHE_VERSION = '1'
+
+# Remember workbook hashes within a run so a workbook read for several sheets is only hashed once
+_fingerprints = {}
+# Frames from the most recent read_excel_many call, so a long-running process (watch mode) skips even the cache load for unchanged sheets
+_recent_frames = {}
+
+
+# Function to flatten a multi-level (merged cell) header into a single header row
+def flatten_header(df):
+    df = df.copy()
+    # Convert all elements to strings before joining
+    df.columns = [' '.join(str(col) for col in cols).strip() for cols in df.columns.values]
+    return df
+
+
+# Function to fingerprint a workbook by its contents
+def file_fingerprint(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _fingerprints:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        _fingerprints[memo_key] = digest.hexdigest()
+    return _fingerprints[memo_key]
+
+
+# Function to build the cache key for one sheet of one workbook version
+def cache_key(path, sheet_name, header, flatten):
+    parts = [CACHE_VERSION, file_fingerprint(path), repr(sheet_name), repr(header), repr(flatten)]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def cache_path_for(key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, key + '.pkl')
+
+
+# Function to load a cached frame, returns None on a miss
+def load_cached(key, cache_dir=CACHE_DIR):
+    path = cache_path_for(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_pickle(path)
+    except Exception as e:
+        print(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+    # Touch the entry so eviction treats it as recently used
+    os.utime(path)
+    return df
+
+
+# Function to store a parsed frame in the cache (written to a temp file first so readers never see half an entry)
+def store_cached(key, df, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path_for(key, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+# Function to evict least recently used entries until the cache fits within max_bytes
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    if not os.path.isdir(cache_dir):
+        return
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.pkl'):
+            continue
+        path = os.path.join(cache_dir, name)
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        print(f"Evicted cache entry {path}")
+
+
+# Function to parse the requested sheets of one workbook, opening the workbook only once
+# Runs inside a worker process, so it stores its results in the cache before handing them back
+# Returns the frames and the seconds spent on each sheet
+def _parse_workbook(path, sheet_specs, keys, cache_dir):
+    frames = []
+    elapsed = []
+    started = time.perf_counter()
+    # pandas opens openpyxl workbooks in read-only (streaming) mode
+    with pd.ExcelFile(path, engine='openpyxl') as workbook:
+        for (sheet_name, header, flatten), key in zip(sheet_specs, keys):
+            df = workbook.parse(sheet_name=sheet_name, header=header)
+            if flatten:
+                df = flatten_header(df)
+            store_cached(key, df, cache_dir)
+            frames.append(df)
+            # The first sheet also carries the cost of opening the workbook
+            elapsed.append(time.perf_counter() - started)
+            started = time.perf_counter()
+    return frames, elapsed
+
+
+# Function to split the missed sheets into worker tasks, each (path, items) with items from a single workbook
+# A workbook with more sheets than one worker should take (its share of all the missed sheets) is split into chunks,
+# so adding sheets to one workbook spreads over the workers instead of lengthening one task
+def plan_tasks(misses, workers):
+    sheets_per_task = max(1, math.ceil(sum(len(items) for items in misses.values()) / workers))
+    return [(path, items[start:start + sheets_per_task])
+            for path, items in misses.items() for start in range(0, len(items), sheets_per_task)]
+
+
+# Function to read several workbooks/sheets in parallel; each worker task opens one workbook once for its chunk of sheets
+# specs is a list of (path, sheet_name, header, flatten) tuples; frames are returned in the same order
+# Seconds spent per sheet are recorded in timings (keyed "path [sheet]") when a dict is passed
+def read_excel_many(specs, refresh=False, max_workers=None, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, timings=None):
+    frames = [None] * len(specs)
+    keys = [None] * len(specs)
+    if timings is None:
+        timings = {}
+
+    # Serve what we can from memory or the cache and group the misses by workbook
+    misses = {}
+    for i, (path, sheet_name, header, flatten) in enumerate(specs):
+        started = time.perf_counter()
+        key = keys[i] = cache_key(path, sheet_name, header, flatten)
+        df = None
+        if not refresh:
+            df = _recent_frames.get(key)
+            if df is None:
+                df = load_cached(key, cache_dir)
+                if df is not None:
+                    print(f"Loaded {path} [{sheet_name}] from cache")
+        if df is not None:
+            frames[i] = df
+            timings[f"{path} [{sheet_name}]"] = time.perf_counter() - started
+        else:
+            misses.setdefault(path, []).append((i, (sheet_name, header, flatten), key))
+
+    tasks = plan_tasks(misses, max_workers or os.cpu_count() or 1) if misses else []
+    if len(tasks) == 1:
+        # A single task is not worth the cost of starting worker processes
+        results = [_parse_workbook(path, [s for _, s, _ in items], [k for _, _, k in items], cache_dir) for path, items in tasks]
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=max_workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+            futures = [pool.submit(_parse_workbook, path, [s for _, s, _ in items], [k for _, _, k in items], cache_dir)
+                       for path, items in tasks]
+            results = [future.result() for future in futures]
+    else:
+        results = []
+
+    # Put the parsed frames back in the order they were requested
+    for (path, items), (parsed, elapsed) in zip(tasks, results):
+        for (i, (sheet_name, _, _), _), df, seconds in zip(items, parsed, elapsed):
+            frames[i] = df
+            timings[f"{path} [{sheet_name}]"] = seconds
+
+    _recent_frames.clear()
+    _recent_frames.update(zip(keys, frames))
+
+    if misses:
+        evict_cache(cache_dir, max_bytes)
+    return frames
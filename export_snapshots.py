@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+# Batch export of Gantt chart snapshots for the steering pack: one chart per Department / Location / Tier
+# combination, in each requested format, built with the same functions as the dashboard
+#
+#   python export_snapshots.py --formats png pdf --output-dir snapshots
+#
+# Rendering needs the kaleido static image renderer (pip install kaleido), the charts are rendered in a
+# process pool. A preset whose chart data has not changed since the last export on the same day is skipped (the
+# charts carry a "Today" line); the hashes are kept in manifest.json in the output directory. Use --force to
+# render everything again.
+
+FORMATS = ['png', 'svg', 'pdf']
+MANIFEST_NAME = 'manifest.json'
+# Columns that end up in the chart, the hash of a preset covers these
+FIGURE_COLUMNS = ['Task', 'Phase', 'Start', 'Finish', 'Department', 'PM', 'Location', 'Type', 'Tier', 'RolesInfo']
+SNAPSHOT_WIDTH = 1600
+
+
+# Function to turn a preset into a file name
+def preset_stem(department, location, tier):
+    return re.sub(r'[^\w.-]+', '-', f"{department}_{location}_tier{tier}")
+
+
+# Function to select and sort the rows of one preset, the same way update_graph does without PM or project filters
+# Returns the rows and the hash of the data, settings and date behind the chart, or (None, None) when nothing matches
+def snapshot_data(mg, df, view, department, location, tier):
+    filtered_df = mg.filter_dataframe(df, [department], [str(tier)], [location], view['types'], view['stages'], view['categories'])
+    if filtered_df.empty:
+        return None, None
+    sorted_df = mg.sort_dataframe(mg.aggregate_and_merge_data(filtered_df), view['sort'])
+
+    # The date is part of the hash as the chart draws a "Today" line, like the key in memoize_callback
+    today = datetime.now().date().isoformat()
+    digest = hashlib.sha256(json.dumps([view['color'], view['sort'], SNAPSHOT_WIDTH, today]).encode('utf-8'))
+    digest.update(sorted_df[FIGURE_COLUMNS].to_csv(index=False).encode('utf-8'))
+    return sorted_df, digest.hexdigest()
+
+
+# Function to build the chart of one preset as a plain dict, ready to send to a render process
+def snapshot_figure(mg, sorted_df, view, title):
+    task_order = sorted_df['Task'].unique().tolist()
+    task_order.reverse()
+    height = mg.get_graph_container_height(len(task_order))
+    fig = mg.create_gantt_chart(sorted_df, view['color'], task_order, mg.pm_colors, mg.phase_colors, height)
+    mg.add_current_date_line(fig)
+    # No range slider in a static image
+    mg.toggle_range_slider(fig, 0)
+    fig.update_layout(title=title, width=SNAPSHOT_WIDTH, height=height)
+    return fig.to_dict()
+
+
+# Function to render one preset in every format, runs inside a worker process
+def render_snapshot(figure, stem, formats, output_dir):
+    import plotly.graph_objs as go
+    started = time.perf_counter()
+    fig = go.Figure(figure)
+    for fmt in formats:
+        fig.write_image(os.path.join(output_dir, f"{stem}.{fmt}"), format=fmt)
+    return time.perf_counter() - started
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Function to write the manifest through a temp file so an interrupted export never leaves half of it
+def write_manifest(path, manifest):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Gantt chart snapshots for every Department / Location / Tier combination")
+    parser.add_argument('--output-dir', default='snapshots', help="Directory for the images and manifest.json")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['png'], help="Image formats to write")
+    parser.add_argument('--portfolio', help="Portfolio to export (see FUPP_DATASETS), the default one when omitted")
+    parser.add_argument('--departments', nargs='+', help="Departments to export, all of them when omitted")
+    parser.add_argument('--locations', nargs='+', help="Locations to export, all of them when omitted")
+    parser.add_argument('--tiers', nargs='+', help="Tiers to export, all of them when omitted")
+    parser.add_argument('--color', choices=['Phase', 'PM'], help="Colour the bars by phase or PM (default as in the dashboard)")
+    parser.add_argument('--workers', type=int, default=None, help="Render processes (default: one per CPU)")
+    parser.add_argument('--force', action='store_true', help="Render every preset, even when its data is unchanged")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec('kaleido') is None:
+        print("Rendering snapshots needs the kaleido package: pip install kaleido")
+        sys.exit(1)
+
+    import make_Gantt as mg
+
+    df = mg.get_data(args.portfolio)
+    view = dict(mg.DEFAULT_VIEW, **({'color': args.color} if args.color else {}))
+    departments = args.departments or sorted(df['Department'].unique())
+    locations = args.locations or sorted(df['Location'].unique())
+    tiers = args.tiers or [str(tier) for tier in sorted(df['Tier'].unique(), key=str)]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    # Charts are only built for presets whose data changed, and only rendering goes to the process pool
+    started = time.perf_counter()
+    pending = {}
+    skipped = 0
+    for department, location, tier in itertools.product(departments, locations, tiers):
+        sorted_df, data_hash = snapshot_data(mg, df, view, department, location, tier)
+        if sorted_df is None:
+            continue
+        stem = preset_stem(department, location, tier)
+        outputs_exist = all(os.path.exists(os.path.join(args.output_dir, f"{stem}.{fmt}")) for fmt in args.formats)
+        if not args.force and manifest.get(stem) == data_hash and outputs_exist:
+            skipped += 1
+            continue
+        pending[stem] = (snapshot_figure(mg, sorted_df, view, f"{department} / {location} / Tier {tier}"), data_hash)
+    print(f"Checked {len(pending) + skipped} preset(s) in {time.perf_counter() - started:.2f}s, "
+          f"{skipped} unchanged and skipped, {len(pending)} to render")
+
+    failures = 0
+    if pending:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers or min(len(pending), os.cpu_count() or 1)) as pool:
+            futures = {pool.submit(render_snapshot, figure, stem, args.formats, args.output_dir): stem
+                       for stem, (figure, _) in pending.items()}
+            for future in as_completed(futures):
+                stem = futures[future]
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    failures += 1
+                    print(f"Failed to render {stem}: {e}")
+                    continue
+                manifest[stem] = pending[stem][1]
+                print(f"Rendered {stem} ({', '.join(args.formats)}) in {seconds:.2f}s")
+        write_manifest(manifest_path, manifest)
+        print(f"Rendered {len(pending) - failures} snapshot(s) in {time.perf_counter() - started:.2f}s")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,44 @@
 import pandas as pd
+import argparse
 import csv
+import os
 import re
+import time
+from excel_cache import read_excel_many
+from change_set import update_change_set
 
-def process_dept_data(df_dept, csv_writer, last_updated_date):
+# Department plan workbook, add a sheet name here to include another department
+DEPT_WORKBOOK = 'Verkefnaplan í VOS.xlsx'
+DEPT_SHEETS = ['V&V', 'SOF']
+
+# Columns of formatted_data.csv
+HEADER = ["Last Updated Date", "Category", "Department", "Location", "Type", "Task", "Phase", "Tier", "PM", "PML", "DM", "PM1", "PM2", "Start", "Finish"]
+DATE_FORMAT = '%d-%b-%y'
+# A date token as written in raw_data.txt, e.g. 01-Dec-23 (hyphenated names such as "Runway 01-19" do not match)
+DATE_TOKEN = re.compile(r'\d{1,2}-(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{2}', re.IGNORECASE)
+STRING_COLUMNS = ["Category", "Department", "Location", "Type", "Task", "Phase", "PM", "PML", "DM", "PM1", "PM2"]
+
+
+# Function to pick the date tokens out of a raw_data.txt line
+def extract_dates(line):
+    return [part for part in line.split() if DATE_TOKEN.fullmatch(part)]
+
+
+# Function to parse a column of date strings with the explicit format
+# Values that are present but do not parse are reported rather than silently dropped
+def parse_date_column(frame, column, date_format=DATE_FORMAT):
+    parsed = pd.to_datetime(frame[column], format=date_format, errors='coerce')
+    failed = parsed.isna() & frame[column].notna()
+    for index in frame.index[failed]:
+        print(f"Could not parse {column} '{frame.at[index, column]}' for {frame.at[index, 'Task']} / {frame.at[index, 'Phase']}")
+    return parsed
+
+
+# Path of the typed frame written next to the CSV
+def typed_output_path(output_path):
+    return os.path.splitext(output_path)[0] + '.pkl'
+
+def process_dept_data(df_dept, output_rows, last_updated_date, source):
     for index, row in df_dept.iterrows():
         if pd.isna(row["Verkefnaheiti"]) or row["Verkefnaheiti"] == '':
             continue
@@ -43,12 +79,12 @@ def process_dept_data(df_dept, csv_writer, last_updated_date):
             # Convert column names (dates) to datetime objects
             start_date = pd.to_datetime(start_date).date()
             finish_date = pd.to_datetime(finish_date).date()
-            start_date = start_date.strftime('%d-%b-%y')
-            finish_date = finish_date.strftime('%d-%b-%y')
+            start_date = start_date.strftime(DATE_FORMAT)
+            finish_date = finish_date.strftime(DATE_FORMAT)
             dates=[start_date, finish_date]
 
-            # Write to the CSV using writerow
-            csv_writer.writerow([
+            # Collect the row for the CSV, tagged with the sheet it came from
+            output_rows.append((source, [
                 last_updated_date,
                 current_category,
                 department,
@@ -64,91 +100,132 @@ def process_dept_data(df_dept, csv_writer, last_updated_date):
                 "",
                 dates[0],
                 dates[1]
-            ])
-
-
-
-# Read the Excel file with two header rows for merged cells
-df = pd.read_excel('Projects_info.xlsx', header=[0, 1], engine='openpyxl')
-
-# Flatten the multi-level header and create a single header row
-# Convert all elements to strings before joining
-df.columns = [' '.join(str(col) for col in cols).strip() for cols in df.columns.values]
-
-print("Column headers after flattening:", df.columns.tolist())
-
-last_updated_date = '2023-12-12'
-
-# Use the corrected column names after flattening the headers
-project_name_column = 'Project Name Unnamed: 0_level_1'
-category_column = 'Category Unnamed: 1_level_1'
-department_column = 'Department Unnamed: 2_level_1'
-location_column = 'Location Unnamed: 3_level_1'
-type_column = 'Type Unnamed: 4_level_1'
-tier_column = 'Tier Unnamed: 5_level_1'
-
-# Create a dictionary to store project information
-project_dict = {}
-for index, row in df.iterrows():
-    project_name = row[project_name_column]#[0]  # Use the correct project name column header
-    project_info = {
-        "Category": row[category_column],
-        "Department": row[department_column],
-        "Location": row[location_column],
-        "Type": row[type_column],
-        "Tier": row[tier_column],
-        # Initialize stages info with empty dictionaries
-        "Strategies and Plans": {},
-        "Stage 0": {},
-        "Stage 1": {},
-        "Stage 2": {},
-        "Stage 3": {},
-        "Stage 4": {},
-        "Procurement": {},
-        "Stage 5": {},
-        "Stage 6": {}
-    }
-
-    # Update project_info with PM details for each stage
-    for stage in project_info.keys():
-        if project_info[stage] is not None and isinstance(project_info[stage], dict):  # Ensure project_info[stage] is a dictionary
-            if stage in ['Strategies and Plans', 'Stage 0', 'Stage 1', 'Stage 2']:
-                project_info[stage]['PM1'] = row.get(f'{stage} PM', None)
-                project_info[stage]['PM2'] = row.get(f'{stage} PM1', None)
-            else:  # For 'Stage 3', 'Stage 4', 'Stage 5', 'Stage 6'
-                project_info[stage]['PML'] = row.get(f'{stage} PML', None)
-                project_info[stage]['DM'] = row.get(f'{stage} DM', None)
-                project_info[stage]['PM1'] = row.get(f'{stage} PM1', None)
-                project_info[stage]['PM2'] = row.get(f'{stage} PM2', None)
-    project_dict[project_name] = project_info
-
-# Debug: Print a sample from the project dictionary to verify its structure
-print("Sample project info from the dictionary:", next(iter(project_dict.items())))
-
-
-#print(project_dict)
-# Extract project names from the DataFrame
-project_names = df[project_name_column].tolist()  # Use the correct project name column header
-project_names = sorted(project_names, key=len, reverse=True)
-#print(project_dict)
-
-with open("raw_data.txt", "r") as f:
-    lines = f.readlines()
-
-with open("formatted_data.csv", "w", newline='') as output_file:
-    writer = csv.writer(output_file)
-    # Write the header for the output file
-    writer.writerow(["Last Updated Date", "Category", "Department", "Location", "Type", "Task", "Phase", "Tier", "PM", "PML", "DM", "PM1", "PM2", "Start", "Finish"])
-    
-    df_vv = pd.read_excel('Verkefnaplan í VOS.xlsx', sheet_name='V&V', header=1, engine='openpyxl')
-    df_sof = pd.read_excel('Verkefnaplan í VOS.xlsx', sheet_name='SOF', header=1, engine='openpyxl')
-    process_dept_data(df_vv, writer, last_updated_date)
-    process_dept_data(df_sof, writer, last_updated_date)
+            ]))
+
+
+# Function to turn the collected rows into a typed DataFrame
+# Start/Finish become datetime64, Tier a (nullable) integer and the text columns stripped categoricals
+def to_typed_frame(output_rows):
+    frame = pd.DataFrame([row for _, row in output_rows], columns=HEADER)
+    frame['Last Updated Date'] = pd.to_datetime(frame['Last Updated Date'], format='%Y-%m-%d')
+    frame['Start'] = parse_date_column(frame, 'Start')
+    frame['Finish'] = parse_date_column(frame, 'Finish')
+    frame['Tier'] = pd.to_numeric(frame['Tier'], errors='coerce').astype('Int64')
+    for column in STRING_COLUMNS:
+        # Blank cells and the 'nan' text pandas leaves behind for empty Excel cells become missing values
+        values = frame[column].astype('string').str.strip()
+        values = values.mask(values.isin(['', 'nan', 'NaN']))
+        frame[column] = values.astype(object).where(values.notna(), None).astype('category')
+    return frame
+
+
+# Function to write a file next to its final path and rename it into place, so readers never see a half-written file
+def publish_atomically(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_csv(path, output_rows):
+    with open(path, "w", newline='', encoding='utf-8') as output_file:
+        writer = csv.writer(output_file)
+        # Write the header for the output file
+        writer.writerow(HEADER)
+        writer.writerows(row for _, row in output_rows)
+
+
+# Run the whole ETL and return the typed DataFrame
+# The CSV (UTF-8) and a pickle of the typed frame are written to output_path unless it is None
+# Seconds spent per input and on writing are recorded in timings when a dict is passed
+def build_formatted_data(output_path="formatted_data.csv", raw_data_path="raw_data.txt", projects_path='Projects_info.xlsx', refresh_cache=False, incremental=False, timings=None):
+    if timings is None:
+        timings = {}
+
+    # Read every workbook/sheet up front, one worker process per workbook
+    # Projects_info.xlsx has two header rows for merged cells, the multi-level header is flattened into a single header row
+    specs = [(projects_path, 0, [0, 1], True)] + [(DEPT_WORKBOOK, sheet, 1, False) for sheet in DEPT_SHEETS]
+    frames = read_excel_many(specs, refresh=refresh_cache, timings=timings)
+    df = frames[0]
+    dept_frames = frames[1:]
+
+    print("Column headers after flattening:", df.columns.tolist())
+
+    last_updated_date = '2023-12-12'
+
+    # Use the corrected column names after flattening the headers
+    project_name_column = 'Project Name Unnamed: 0_level_1'
+    category_column = 'Category Unnamed: 1_level_1'
+    department_column = 'Department Unnamed: 2_level_1'
+    location_column = 'Location Unnamed: 3_level_1'
+    type_column = 'Type Unnamed: 4_level_1'
+    tier_column = 'Tier Unnamed: 5_level_1'
+
+    # Create a dictionary to store project information
+    project_dict = {}
+    for index, row in df.iterrows():
+        project_name = row[project_name_column]#[0]  # Use the correct project name column header
+        project_info = {
+            "Category": row[category_column],
+            "Department": row[department_column],
+            "Location": row[location_column],
+            "Type": row[type_column],
+            "Tier": row[tier_column],
+            # Initialize stages info with empty dictionaries
+            "Strategies and Plans": {},
+            "Stage 0": {},
+            "Stage 1": {},
+            "Stage 2": {},
+            "Stage 3": {},
+            "Stage 4": {},
+            "Procurement": {},
+            "Stage 5": {},
+            "Stage 6": {}
+        }
+
+        # Update project_info with PM details for each stage
+        for stage in project_info.keys():
+            if project_info[stage] is not None and isinstance(project_info[stage], dict):  # Ensure project_info[stage] is a dictionary
+                if stage in ['Strategies and Plans', 'Stage 0', 'Stage 1', 'Stage 2']:
+                    project_info[stage]['PM1'] = row.get(f'{stage} PM', None)
+                    project_info[stage]['PM2'] = row.get(f'{stage} PM1', None)
+                else:  # For 'Stage 3', 'Stage 4', 'Stage 5', 'Stage 6'
+                    project_info[stage]['PML'] = row.get(f'{stage} PML', None)
+                    project_info[stage]['DM'] = row.get(f'{stage} DM', None)
+                    project_info[stage]['PM1'] = row.get(f'{stage} PM1', None)
+                    project_info[stage]['PM2'] = row.get(f'{stage} PM2', None)
+        project_dict[project_name] = project_info
+
+    # Debug: Print a sample from the project dictionary to verify its structure
+    print("Sample project info from the dictionary:", next(iter(project_dict.items())))
+
+
+    #print(project_dict)
+    # Extract project names from the DataFrame
+    project_names = df[project_name_column].tolist()  # Use the correct project name column header
+    project_names = sorted(project_names, key=len, reverse=True)
+    #print(project_dict)
+
+    started = time.perf_counter()
+    with open(raw_data_path, "r") as f:
+        lines = f.readlines()
+
+    # Rows are collected as (source, row) pairs and written out once everything is parsed
+    output_rows = []
+
+    # Department sheets are written in the order they are listed in DEPT_SHEETS
+    for sheet, df_dept in zip(DEPT_SHEETS, dept_frames):
+        process_dept_data(df_dept, output_rows, last_updated_date, sheet)
 
 
 
     current_project = None
     current_phase, current_category = None, None
+    # Phase lines where a start or finish date could not be found
+    missing_dates = []
 
     for line in lines:
         stripped_line = line.strip()
@@ -177,7 +254,7 @@ with open("formatted_data.csv", "w", newline='') as output_file:
         elif stripped_line.lower().startswith("strategic plan"): 
             current_phase = "Strategies and Plans"
             current_category="Strategies and Plans"
-            
+
         #print(f"Processing line: {stripped_line}")  # Debugging statement
         #print(f"Current project: {current_project}")  # Debugging statement
         #print(f"Current phase: {current_phase}")  # Debugging statement
@@ -192,14 +269,15 @@ with open("formatted_data.csv", "w", newline='') as output_file:
             proj_info = project_dict.get(current_project)
             if proj_info and current_phase in proj_info:
                 phase_info = proj_info[current_phase]
-                # Extract dates from the line
-                parts = stripped_line.split()
-                dates = [part for part in parts if "-" in part and part != 'A'][-2:]
-                
+                # Extract dates from the line, the last two are the start and finish
+                dates = extract_dates(stripped_line)[-2:]
+                if len(dates) < 2:
+                    missing_dates.append(stripped_line)
+
                 # Determine the front PM based on the hierarchy (PML > DM > PM1 > PM2)
                 front_pm = phase_info.get('PML', '') or phase_info.get('DM', '') or phase_info.get('PM1', '') or phase_info.get('PM2', '')
 
-                writer.writerow([
+                output_rows.append(("raw_data.txt", [
                     last_updated_date, 
                     current_category, 
                     proj_info["Department"], 
@@ -215,11 +293,108 @@ with open("formatted_data.csv", "w", newline='') as output_file:
                     phase_info.get('PM2', ''),  # Get PM2 name if available
                     dates[0] if len(dates) > 0 else None, 
                     dates[1] if len(dates) > 1 else None
-                ])
+                ]))
                 #print(f"Wrote data for project: {current_project}, phase: {current_phase}")  # Debugging statement
                 # Debug: Print details about the data being written to CSV
                 print(f"Writing data for project: {current_project}, phase: {current_phase}")
 
 
         # Reset current phase after processing the line
-        current_phase = None
\ No newline at end of file
+        current_phase = None
+
+    if missing_dates:
+        print(f"{len(missing_dates)} line(s) in {raw_data_path} without a start and finish date:")
+        for line in missing_dates:
+            print(f"  {line}")
+
+    frame = to_typed_frame(output_rows)
+    timings[raw_data_path] = time.perf_counter() - started
+    if output_path is None:
+        return frame
+
+    started = time.perf_counter()
+    publish_atomically(output_path, lambda path: write_csv(path, output_rows))
+    # The dashboard loads the typed frame directly when it is up to date
+    publish_atomically(typed_output_path(output_path), frame.to_pickle)
+
+    # Remember the rows of this output, and with incremental also write the rows that changed since the previous run
+    update_change_set(output_rows, HEADER, output_path, publish_atomically, incremental)
+    timings['write'] = time.perf_counter() - started
+
+    return frame
+
+
+# Function to snapshot the modification time and size of each input file
+def input_state(paths):
+    state = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            state[path] = None
+    return state
+
+
+# Function to run one build and log how long it and each input took
+def timed_build(output_path, raw_data_path, projects_path, incremental):
+    timings = {}
+    started = time.perf_counter()
+    try:
+        build_formatted_data(output_path, raw_data_path, projects_path, incremental=incremental, timings=timings)
+    except Exception as e:
+        # Keep the previous output and carry on watching, the file may have been caught mid-save
+        print(f"Rebuild failed, keeping the previous {output_path}: {e}")
+        return
+    print(f"Rebuilt {output_path} in {time.perf_counter() - started:.2f}s")
+    for name, seconds in timings.items():
+        print(f"  {name}: {seconds:.3f}s")
+
+
+# Watch the inputs and rebuild when they change
+# A burst of saves is collapsed into one rebuild once the files have been quiet for `debounce` seconds
+def watch(output_path="formatted_data.csv", raw_data_path="raw_data.txt", projects_path='Projects_info.xlsx', interval=1.0, debounce=2.0, incremental=False):
+    paths = [raw_data_path, projects_path, DEPT_WORKBOOK]
+    print(f"Watching {', '.join(paths)}")
+    last_state = input_state(paths)
+    timed_build(output_path, raw_data_path, projects_path, incremental)
+
+    while True:
+        time.sleep(interval)
+        state = input_state(paths)
+        if state == last_state:
+            continue
+
+        # Wait for the files to settle
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < debounce:
+            time.sleep(min(interval, debounce))
+            new_state = input_state(paths)
+            if new_state != state:
+                state = new_state
+                quiet_since = time.monotonic()
+
+        changed = [path for path in paths if state[path] != last_state[path]]
+        print(f"Change detected in {', '.join(changed)}")
+        last_state = state
+        # Unchanged workbooks are served from memory/the parse cache, so only the changed inputs are re-parsed
+        timed_build(output_path, raw_data_path, projects_path, incremental)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build formatted_data.csv from raw_data.txt and the project workbooks")
+    parser.add_argument('--output', default="formatted_data.csv", help="CSV file to write")
+    parser.add_argument('--raw-data', default="raw_data.txt", help="Schedule export to read")
+    parser.add_argument('--refresh-cache', action='store_true', help="Ignore cached sheets and re-parse the workbooks")
+    parser.add_argument('--incremental', action='store_true', help="Also write a change set against the previous run")
+    parser.add_argument('--watch', action='store_true', help="Keep running and rebuild whenever an input file changes")
+    parser.add_argument('--debounce', type=float, default=2.0, help="Seconds the inputs must be quiet before a rebuild (watch mode)")
+    args = parser.parse_args()
+    if args.watch:
+        watch(args.output, args.raw_data, debounce=args.debounce, incremental=args.incremental)
+    else:
+        build_formatted_data(args.output, args.raw_data, refresh_cache=args.refresh_cache, incremental=args.incremental)
+
+
+if __name__ == '__main__':
+    main()
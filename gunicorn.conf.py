@@ -0,0 +1,9 @@
+# gunicorn settings, read automatically when gunicorn is started from this directory
+#   gunicorn -w 4 -b 0.0.0.0:8050 make_Gantt:server
+
+
+# Warm each worker's caches once it has imported make_Gantt, before it accepts requests
+# (importing make_Gantt no longer does this, so spawning a worker stays cheap)
+def post_worker_init(worker):
+    import make_Gantt
+    make_Gantt.warm_up()
@@ -0,0 +1,275 @@
+import argparse
+import http.client
+import json
+import math
+import random
+import shlex
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Load test for the dashboard: many simulated planners replaying dashboard sessions against a running server
+#
+#   python make_Gantt.py                                   (or: gunicorn -w 4 -b 127.0.0.1:8050 make_Gantt:server)
+#   python load_test.py --url http://127.0.0.1:8050 --users 50 --sessions 3
+#
+# or let the tool start and stop the server, to compare serving configurations:
+#
+#   python load_test.py --start "gunicorn -w 4 -b 127.0.0.1:8050 make_Gantt:server"
+#
+# Scripted sessions load the page, then toggle a department, pick PMs, search projects, change the sort
+# and toggle the slider, firing the same callback chains the browser would (read from /_dash-dependencies).
+# --replay takes a JSON list of recorded _dash-update-component request bodies and sends them as-is.
+
+
+# Thin HTTP client, one keep-alive connection per simulated user
+class Client:
+    def __init__(self, url, stats):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.stats = stats
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body=None, name=None):
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # Start over on a fresh connection next time
+            self.connection.close()
+            status, data = None, b''
+        self.stats.record(name or f"{method} {path}", time.perf_counter() - started, status is None or status >= 400)
+        return status, data
+
+    def close(self):
+        self.connection.close()
+
+
+# Thread-safe collection of latencies and errors per callback
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name, seconds, failed):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            self.errors[name] = self.errors.get(name, 0) + (1 if failed else 0)
+
+
+# Function to pick a percentile by nearest rank: the smallest value with at least pct% of the values at or below it
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# Function to collect the initial property values of every component with an id in the layout
+def initial_state(node, state):
+    if isinstance(node, list):
+        for child in node:
+            initial_state(child, state)
+    elif isinstance(node, dict) and 'props' in node:
+        props = node['props']
+        if 'id' in props:
+            for prop, value in props.items():
+                if prop not in ('id', 'children'):
+                    state[(props['id'], prop)] = value
+        initial_state(props.get('children'), state)
+
+
+# Function to split a dependency output string ("id.prop" or "..a.x...b.y..") into (id, prop) pairs
+def parse_outputs(output):
+    outputs = output.strip('.').split('...') if output.startswith('..') else [output]
+    return [tuple(item.rsplit('.', 1)) for item in outputs]
+
+
+# A simulated browser session: keeps component state and fires callbacks like dash-renderer does
+class Session:
+    def __init__(self, client, dependencies, layout):
+        self.client = client
+        self.callbacks = []
+        for dependency in dependencies:
+            if dependency.get('clientside_function'):
+                continue
+            self.callbacks.append({
+                'output': dependency['output'],
+                'outputs': parse_outputs(dependency['output']),
+                'inputs': [(i['id'], i['property']) for i in dependency['inputs']],
+                'state': [(s['id'], s['property']) for s in dependency['state']],
+                'initial': not dependency.get('prevent_initial_call'),
+            })
+        self.state = {}
+        initial_state(layout, self.state)
+
+    def fire(self, callback, changed):
+        body = {
+            'output': callback['output'],
+            'outputs': [{'id': i, 'property': p} for i, p in callback['outputs']] if len(callback['outputs']) > 1
+            else {'id': callback['outputs'][0][0], 'property': callback['outputs'][0][1]},
+            'inputs': [{'id': i, 'property': p, 'value': self.state.get((i, p))} for i, p in callback['inputs']],
+            'state': [{'id': i, 'property': p, 'value': self.state.get((i, p))} for i, p in callback['state']],
+            'changedPropIds': [f"{i}.{p}" for i, p in changed],
+        }
+        status, data = self.client.request('POST', '/_dash-update-component', body, name=callback['output'])
+        # 204 means the callback raised PreventUpdate, nothing changes downstream
+        if status != 200:
+            return []
+        updated = []
+        for component_id, props in json.loads(data).get('response', {}).items():
+            for prop, value in props.items():
+                self.state[(component_id, prop)] = value
+                updated.append((component_id, prop))
+        return updated
+
+    # Run every callback affected by the changed properties, upstream callbacks first
+    def cascade(self, changed, initial=False):
+        changed = set(changed)
+        pending = [cb for cb in self.callbacks if (initial and cb['initial']) or changed & set(cb['inputs'])]
+        fired = set()
+        while pending:
+            produced = {output for cb in pending for output in cb['outputs']}
+            # Pick a callback none of whose inputs are still waiting on another pending callback
+            ready = [cb for cb in pending if not (set(cb['inputs']) - set(cb['outputs'])) & produced] or pending[:1]
+            callback = ready[0]
+            pending.remove(callback)
+            fired.add(callback['output'])
+            updated = self.fire(callback, changed & set(callback['inputs']) or callback['inputs'])
+            changed.update(updated)
+            for cb in self.callbacks:
+                if cb['output'] not in fired and cb not in pending and set(updated) & set(cb['inputs']):
+                    pending.append(cb)
+
+    def set(self, component_id, prop, value):
+        self.state[(component_id, prop)] = value
+        self.cascade([(component_id, prop)])
+
+    def options(self, component_id):
+        return [option['value'] for option in self.state.get((component_id, 'options')) or []]
+
+
+# Scripted session: page load, then the interactions planners use the most
+def scripted_session(client, think):
+    client.request('GET', '/')
+    _, layout = client.request('GET', '/_dash-layout')
+    _, dependencies = client.request('GET', '/_dash-dependencies')
+    session = Session(client, json.loads(dependencies), json.loads(layout))
+    session.cascade([], initial=True)
+
+    departments = session.state.get(('department-checklist-items', 'value')) or []
+    other_departments = [d for d in session.options('department-checklist-items') if d not in departments]
+    steps = []
+    if other_departments:
+        # Toggle a department on and off again
+        extra = random.choice(other_departments)
+        steps += [('department-checklist-items', 'value', departments + [extra]),
+                  ('department-checklist-items', 'value', departments)]
+    pms = session.options('pm-checklist-items')
+    if pms:
+        steps.append(('pm-checklist-items', 'value', random.sample(pms, min(2, len(pms)))))
+    # Type a few letters into the project search
+    steps += [('filtered-project-list-checklist', 'search_value', query) for query in ('t', 'te')]
+    steps += [
+        ('sort-dropdown', 'value', random.choice(['Task', 'PM', 'Project_Finish', 'Stage_5_Start'])),
+        ('toggle-slider-button', 'n_clicks', 1),
+        ('pm-checklist-items', 'value', []),
+        ('toggle-slider-button', 'n_clicks', 2),
+    ]
+    for component_id, prop, value in steps:
+        time.sleep(random.uniform(0, think))
+        session.set(component_id, prop, value)
+
+
+# Recorded session: send the captured request bodies in order
+def replay_session(client, think, recorded):
+    client.request('GET', '/')
+    for body in recorded:
+        time.sleep(random.uniform(0, think))
+        client.request('POST', '/_dash-update-component', body, name=body.get('output'))
+
+
+def wait_until_up(url, timeout):
+    deadline = time.monotonic() + timeout
+    parts = urlsplit(url)
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=5)
+            connection.request('GET', parts.path or '/')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+def report(stats, elapsed):
+    total = sum(len(v) for v in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    print(f"{total} requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s, error rate {errors / max(total, 1):.2%}")
+    print(f"{'callback':<60} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>7} {'errors':>7}")
+    for name, values in sorted(stats.latencies.items()):
+        print(f"{name[:60]:<60} {len(values):>6} {percentile(values, 50) * 1000:>8.1f} {percentile(values, 95) * 1000:>8.1f} "
+              f"{percentile(values, 99) * 1000:>8.1f} {len(values) / elapsed:>7.1f} {stats.errors[name] / len(values):>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard sessions from many concurrent simulated users")
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help="Base URL of the running dashboard")
+    parser.add_argument('--users', type=int, default=50, help="Concurrent simulated users")
+    parser.add_argument('--sessions', type=int, default=1, help="Sessions each user runs one after another")
+    parser.add_argument('--think', type=float, default=1.0, help="Maximum random pause between interactions (seconds)")
+    parser.add_argument('--ramp', type=float, default=5.0, help="Seconds over which the users start")
+    parser.add_argument('--replay', help="JSON file with a list of recorded _dash-update-component request bodies")
+    parser.add_argument('--start', help="Command that starts the server; it is stopped when the test ends")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.replay:
+        with open(args.replay, encoding='utf-8') as f:
+            recorded = json.load(f)
+
+    server = None
+    if args.start:
+        server = subprocess.Popen(shlex.split(args.start))
+    try:
+        wait_until_up(args.url, timeout=120)
+        stats = Stats()
+
+        def user(number):
+            time.sleep(args.ramp * number / max(args.users, 1))
+            client = Client(args.url, stats)
+            try:
+                for _ in range(args.sessions):
+                    if recorded is not None:
+                        replay_session(client, args.think, recorded)
+                    else:
+                        scripted_session(client, args.think)
+            except Exception as e:
+                print(f"User {number} stopped: {e}")
+            finally:
+                client.close()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=user, args=(number,)) for number in range(args.users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report(stats, time.perf_counter() - started)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,56 +1,321 @@
 # Import packages
-from dash import Dash, html, dcc
-from dash.dependencies import Input, Output, State
+from dash import Dash, html, dcc, ctx
+from dash.dependencies import Input, Output, State, ClientsideFunction
 from dash.exceptions import PreventUpdate
+import flask
+import numpy as np
 import pandas as pd
-import plotly.express as px
 from datetime import datetime
 import plotly.graph_objs as go
+import plotly.io as pio
+import bisect
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import parse_qs
 import warnings
+from summary_cube import DAYS_PER_MONTH, build_summary_cube, select_cells, summarize_cells, summarize_frame
 warnings.filterwarnings("ignore")
 # Set display options to show all columns
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 1000)
 pd.set_option('display.max_colwidth', None)
 
-# Read data from the new CSV file with specified encoding
-df = pd.read_csv("formatted_data.csv", encoding='ISO-8859-1', parse_dates=["Start", "Finish", "Last Updated Date"])
-
-try:
-    # Strip leading and trailing spaces from string columns only
-    string_columns = df.select_dtypes(include=['object']).columns
-    df[string_columns] = df[string_columns].apply(lambda x: x.str.strip())
-    
+DATA_PATH = "formatted_data.csv"
+
+# Set FUPP_CLIENTSIDE=1 to ship the dataset to the browser once and run the filtering callbacks there
+# (assets/clientside_engine.js) instead of on the server
+CLIENTSIDE_MODE = os.environ.get('FUPP_CLIENTSIDE', '0') == '1'
+
+# Function to load the data written by format_txt.py
+def load_data(data_path=DATA_PATH):
+    # Prefer the typed frame format_txt.py writes next to the CSV, it needs no parsing or re-encoding
+    typed_path = os.path.splitext(data_path)[0] + '.pkl'
+    if os.path.exists(typed_path) and (not os.path.exists(data_path) or os.path.getmtime(typed_path) >= os.path.getmtime(data_path)):
+        data = pd.read_pickle(typed_path)
+        # Categoricals back to plain strings so the filters and charts see the same values as the CSV path
+        category_columns = data.select_dtypes(include=['category']).columns
+        data[category_columns] = data[category_columns].astype(object)
+        # Tier the way read_csv gives it: int64, or float64 when some are blank (nullable Int64 rejects the 'Unknown PM' fill)
+        data['Tier'] = data['Tier'].astype('float64' if data['Tier'].hasnans else 'int64')
+        return data
+
+    # Dates are written by format_txt.py in fixed formats, so parse them explicitly rather than inferring
+    date_formats = {"Start": '%d-%b-%y', "Finish": '%d-%b-%y', "Last Updated Date": '%Y-%m-%d'}
+    try:
+        return pd.read_csv(data_path, encoding='utf-8', parse_dates=list(date_formats), date_format=date_formats)
+    except UnicodeDecodeError:
+        # CSVs written before format_txt.py switched to UTF-8
+        return pd.read_csv(data_path, encoding='ISO-8859-1', parse_dates=list(date_formats), date_format=date_formats)
+
+# Function to strip a text column and fill its blanks with 'Unknown PM'
+# The work is done once per distinct value and mapped back through the factorized codes
+def normalize_text_column(column):
+    codes, uniques = pd.factorize(column)
+    cleaned = pd.Series(uniques, dtype=object).str.strip()
     # Replace 'NaN', 'nan', or any other variant with 'Unknown'
-    df.replace({'NaN': 'Unknown PM', 'nan': 'Unknown PM', '': 'Unknown PM'}, inplace=True)
-    # Replace NaN values with 'Unknown' in the entire DataFrame
-    df.fillna('Unknown PM', inplace=True)
-    # Convert 'Start' and 'Finish' to datetime if not already parsed
-    df['Start'] = pd.to_datetime(df['Start'])
-    df['Finish'] = pd.to_datetime(df['Finish'])
-    df['Last Updated Date'] = pd.to_datetime(df['Last Updated Date'])
-
-    # Sort the DataFrame based on 'Start'
-    df = df.sort_values(by="Start", ascending=False)
-
-    # Aggregate start and finish times for each task and merge
-    project_timeframes = df.groupby('Task').agg({'Start': 'min', 'Finish': 'max'})
-    df = df.merge(project_timeframes, on='Task', suffixes=('', '_Project'))
-
-except Exception as e:
-    print(f"An error occurred: {e}")
-    df = pd.DataFrame()  # Create an empty DataFrame if there's an error
-
-#print(f"after reading in data: {df.head()}")  # Debugging statement
+    cleaned = cleaned.replace({'NaN': 'Unknown PM', 'nan': 'Unknown PM', '': 'Unknown PM'}).fillna('Unknown PM')
+    # Missing values get code -1, which picks the 'Unknown PM' appended at the end
+    lookup = np.append(cleaned.to_numpy(dtype=object), 'Unknown PM')
+    return pd.Series(lookup[codes], index=column.index, name=column.name)
+
+
+# Function to clean up the loaded data and add the project-level columns
+def prepare_data(df):
+    try:
+        # Strip leading and trailing spaces from string columns only
+        string_columns = df.select_dtypes(include=['object']).columns
+        for column in string_columns:
+            df[column] = normalize_text_column(df[column])
+
+        # Replace NaN values with 'Unknown' in the remaining columns (only needed when they have gaps)
+        for column in df.columns.difference(string_columns):
+            if df[column].hasnans:
+                df[column] = df[column].fillna('Unknown PM')
+
+        # Convert 'Start' and 'Finish' to datetime if not already parsed
+        for column in ['Start', 'Finish', 'Last Updated Date']:
+            if not pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = pd.to_datetime(df[column])
+
+        # Sort the DataFrame based on 'Start'
+        df = df.sort_values(by="Start", ascending=False).reset_index(drop=True)
+
+        # Aggregate start and finish times for each task
+        by_task = df.groupby('Task')
+        df['Start_Project'] = by_task['Start'].transform('min')
+        df['Finish_Project'] = by_task['Finish'].transform('max')
+
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        df = pd.DataFrame()  # Create an empty DataFrame if there's an error
+
+    # Apply the function to the DataFrame
+    return create_roles_info(df)
+
+
+# Portfolios served by this process, name -> formatted_data.csv written by format_txt.py for it
+# e.g. FUPP_DATASETS="kef=kef/formatted_data.csv,aey=aey/formatted_data.csv"; the first one is the default
+# A portfolio is picked by the page URL, /<name> or ?portfolio=<name>
+def parse_datasets(spec):
+    datasets = OrderedDict()
+    for item in spec.split(','):
+        if item.strip():
+            name, _, path = item.partition('=')
+            datasets[name.strip()] = path.strip()
+    return datasets
+
+DATASETS = parse_datasets(os.environ.get('FUPP_DATASETS', '')) or OrderedDict(default=DATA_PATH)
+DEFAULT_DATASET = next(iter(DATASETS))
+# Loaded portfolios are evicted, least recently used first, while together they take more memory than this
+# (data, summary cube, clientside encoding and cached callback results); the last one left trims its caches instead
+DATASET_MEMORY_BYTES = int(float(os.environ.get('FUPP_DATASET_MEMORY_MB', '1024')) * 1024 * 1024)
+
+
+# Function to estimate the memory a cached value holds, by its pickled size
+def object_bytes(value):
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# One portfolio's data and everything derived from it: layout options, summary cube, clientside encoding and
+# the callback caches. Each piece is built on first use and dropped together with the portfolio on eviction
+class Dataset:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.df = prepare_data(load_data(path))
+        self.df_bytes = int(self.df.memory_usage(deep=True).sum())
+        # Callback name -> OrderedDict of input key -> (result, size in bytes), see memoize_callback
+        self.caches = {}
+        # Callbacks run concurrently (threaded dev server, gunicorn gthread workers), the caches are only touched under this lock
+        self.caches_lock = threading.Lock()
+        self.last_used = time.time()
+        self._layout_options = None
+        self._summary_cube = None
+        self._client_dataset = None
+        self._summary_cube_bytes = 0
+        self._client_dataset_bytes = 0
+
+    # The data-dependent values the layout needs
+    def layout_options(self):
+        if self._layout_options is None:
+            df = self.df
+            # Combine all PM related columns into a single Series and remove 'Unknown'
+            all_pm_names = pd.Series(pd.concat([df['PM'], df['PML'], df['DM'], df['PM1'], df['PM2']], ignore_index=True))
+            all_pm_names = all_pm_names[all_pm_names != 'Unknown'].unique()
+            self._layout_options = {
+                # Update the last updated date in the app layout
+                'last_updated': df['Last Updated Date'].max().strftime("%Y-%m-%d") if not df.empty else "N/A",
+                'departments': [{'label': department, 'value': department} for department in sorted(df['Department'].unique())],
+                # Sort and create dropdown options
+                'pms': [{'label': pm, 'value': pm} for pm in sorted(all_pm_names) if pd.notna(pm)],
+            }
+        return self._layout_options
+
+    def summary_cube(self):
+        if self._summary_cube is None:
+            self._summary_cube = build_summary_cube(self.df)
+            self._summary_cube_bytes = int(self._summary_cube['cells'].memory_usage(deep=True).sum())
+        return self._summary_cube
+
+    # The encoded data shipped to the browser in clientside mode
+    def client_dataset(self):
+        if self._client_dataset is None:
+            self._client_dataset = get_client_dataset(self.df)
+            self._client_dataset_bytes = object_bytes(self._client_dataset)
+        return self._client_dataset
+
+    # Bytes held by the frame, the summary cube, the clientside encoding and the cached callback results
+    def memory_bytes(self):
+        total = self.df_bytes + self._summary_cube_bytes + self._client_dataset_bytes
+        with self.caches_lock:
+            total += sum(size for cache in self.caches.values() for _, size in cache.values())
+        return int(total)
+
+    def cached_results(self):
+        with self.caches_lock:
+            return sum(len(cache) for cache in self.caches.values())
+
+    # Function to drop cached results, oldest first from the largest cache, until at least excess bytes are freed
+    def trim_caches(self, excess):
+        freed = 0
+        with self.caches_lock:
+            while freed < excess:
+                caches = [cache for cache in self.caches.values() if cache]
+                if not caches:
+                    break
+                largest = max(caches, key=lambda cache: sum(size for _, size in cache.values()))
+                freed += largest.popitem(last=False)[1][1]
+        return freed
+
+
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+# One lock per portfolio so loading one does not hold up requests for the others
+_loading_locks = {name: threading.Lock() for name in DATASETS}
+
+# Function returning a portfolio's Dataset, loading it on first use; unknown names get the default portfolio
+def get_dataset(name=None):
+    name = name if name in DATASETS else DEFAULT_DATASET
+    with _datasets_lock:
+        dataset = _datasets.get(name)
+    if dataset is None:
+        with _loading_locks[name]:
+            with _datasets_lock:
+                dataset = _datasets.get(name)
+            if dataset is None:
+                started = time.perf_counter()
+                dataset = Dataset(name, DATASETS[name])
+                print(f"Loaded portfolio {name} from {dataset.path}: {len(dataset.df)} rows, "
+                      f"{dataset.memory_bytes() / 1024 / 1024:.1f} MB in {time.perf_counter() - started:.2f}s")
+                with _datasets_lock:
+                    _datasets[name] = dataset
+                    evict_datasets(keep=name)
+    with _datasets_lock:
+        if name in _datasets:
+            _datasets.move_to_end(name)
+    dataset.last_used = time.time()
+    return dataset
+
+
+# Function to evict idle portfolios, least recently used first, until the loaded ones fit the memory budget
+# Called with _datasets_lock held; the portfolio named by keep is never evicted, it gives up cached results instead
+def evict_datasets(keep=None, max_bytes=DATASET_MEMORY_BYTES):
+    footprints = {name: dataset.memory_bytes() for name, dataset in _datasets.items()}
+    total = sum(footprints.values())
+    for name in list(_datasets):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        del _datasets[name]
+        total -= footprints[name]
+        print(f"Evicted portfolio {name} ({footprints[name] / 1024 / 1024:.1f} MB)")
+    if total > max_bytes and keep in _datasets:
+        _datasets[keep].trim_caches(total - max_bytes)
+
+
+# Function describing every configured portfolio and the memory the loaded ones take
+def describe_datasets():
+    with _datasets_lock:
+        loaded = dict(_datasets)
+    report = []
+    for name, path in DATASETS.items():
+        dataset = loaded.get(name)
+        report.append({
+            'name': name,
+            'path': path,
+            'loaded': dataset is not None,
+            'rows': len(dataset.df) if dataset else 0,
+            'memory_mb': round(dataset.memory_bytes() / 1024 / 1024, 2) if dataset else 0,
+            'cached_results': dataset.cached_results() if dataset else 0,
+            'idle_seconds': round(time.time() - dataset.last_used, 1) if dataset else None,
+        })
+    return report
+
+
+# Function returning a portfolio's data (the default portfolio's when no name is given)
+def get_data(name=None):
+    return get_dataset(name).df
+
+
+# Function to pick the portfolio named by the page URL, /<name> or ?portfolio=<name>
+def dataset_from_url(pathname, search):
+    requested = parse_qs((search or '').lstrip('?')).get('portfolio', [None])[0]
+    if requested is None:
+        requested = (pathname or '/').strip('/').split('/')[0]
+    return requested if requested in DATASETS else DEFAULT_DATASET
+
+
+# Columns the clientside engine needs
+CLIENT_STRING_COLUMNS = ['Category', 'Department', 'Location', 'Type', 'Task', 'Phase', 'PM', 'PML', 'DM', 'PM1', 'PM2', 'RolesInfo']
+CLIENT_DATE_COLUMNS = ['Start', 'Finish']
+
+# Function to encode the data as compact columns for the clientside engine
+# Strings are sent once per distinct value plus a code per row (-1 when missing), dates as days since 1970-01-01
+def encode_dataset(df):
+    columns = {}
+    for column in CLIENT_STRING_COLUMNS:
+        codes, uniques = pd.factorize(df[column])
+        columns[column] = {'values': uniques.tolist(), 'codes': codes.tolist()}
+    for column in CLIENT_DATE_COLUMNS:
+        days = (df[column] - pd.Timestamp('1970-01-01')) // pd.Timedelta(days=1)
+        columns[column] = [None if pd.isna(day) else int(day) for day in days]
+    columns['Tier'] = df['Tier'].tolist()
+    return {'rows': len(df), 'columns': columns}
+
+
+# Function to build the dataset store: the encoded data plus the colours and limits the engine shares with the server
+def get_client_dataset(df):
+    template = pio.templates[pio.templates.default]
+    dataset = encode_dataset(df)
+    dataset['settings'] = {
+        'phase_colors': phase_colors,
+        'pm_colors': pm_colors,
+        'colorway': list(template.layout.colorway),
+        'template': template.to_plotly_json(),
+        'max_phase_bars': MAX_PHASE_BARS,
+        'max_project_bars': MAX_PROJECT_BARS,
+        'search_limit': PROJECT_SEARCH_LIMIT,
+        'days_per_month': DAYS_PER_MONTH,
+    }
+    return dataset
 
-# Update the last updated date in the app layout
-last_updated_date_str = df['Last Updated Date'].max().strftime("%Y-%m-%d") if not df.empty else "N/A"
 
 # Initialize the app
 app = Dash(__name__)
 server = app.server
 app.title = 'FUPP'
 
+# Footprint of the configured portfolios, for monitoring
+@server.route('/_fupp/datasets')
+def datasets_report():
+    return flask.jsonify(describe_datasets())
+
 # Define custom color maps
 phase_colors = {
     'Stage 0': '#5c9977', #
@@ -79,9 +344,37 @@ pm_colors = {
     'Unknown PM': '#cfcfcf'   # 
 }
 
+# Default filter selections, shared by the layout and the start-up cache warm-up
+DEFAULT_VIEW = {
+    'color': 'Phase',
+    'categories': ['Project'],
+    'departments': ['FUPP'],
+    'locations': ['Terminals', 'Airfield', 'Landside'],
+    'types': ['Building', 'Civil', 'Utilities'],
+    'tiers': ['1', '2', '3'],
+    'stages': ['Stage 5', 'Procurement', 'Stage 4', 'Stage 3', 'Stage 2', 'Stage 1', 'Stage 0', 'Strategies and Plans'],
+    'pms': [],
+    'sort': 'Project_Start',
+}
+
+# Filter presets computed before the server accepts traffic, each overrides some of the default selections
+# Set FUPP_WARMUP=0 to skip the warm-up (see warm_up)
+WARMUP_PRESETS = [
+    {},
+    {'color': 'PM'},
+    {'departments': []},
+]
+
+# Level of detail: the most bars one view may draw before phases are rolled up into one bar per project,
+# and projects into one bar per Department / Location
+MAX_PHASE_BARS = 800
+MAX_PROJECT_BARS = 800
+
+# Most matches the project search returns per keystroke
+PROJECT_SEARCH_LIMIT = 20
+
 # Get current date
 current_date_str = datetime.now().strftime("%Y-%m-%d")
-type_options = [{'label': t, 'value': t} for t in df['Type'].unique()]
 #Styles:
 filter_container_style = {
     'display': 'flex',
@@ -142,280 +435,302 @@ right_dropdown_container_style = {
     'gap': '10px',  # Spacing between each dropdown
 }
 
-# Sort the project list alphabetically
-project_options = [{'label': project, 'value': project} for project in sorted(df['Task'].unique())]
-
-# Options for stages
-stage_options = [{'label': stage, 'value': stage} for stage in df['Phase'].unique()]
-
-# Combine all PM related columns into a single Series and remove 'Unknown'
-all_pm_names = pd.Series(pd.concat([df['PM'], df['PML'], df['DM'], df['PM1'], df['PM2']], ignore_index=True))
-all_pm_names = all_pm_names[all_pm_names != 'Unknown'].unique()
-
-# Sort and create dropdown options
-pm_options = [{'label': pm, 'value': pm} for pm in sorted(all_pm_names) if pd.notna(pm)]
+#isavia blue : #4396a7 orange:#e65500
+# Function to build the layout on page load
+# It holds no data: select_dataset fills in the portfolio's options once the page URL is known
+def serve_layout():
 
-# Header layout with title, button, and logos
-header_layout = html.Div([
-    # Title and Timeline Slider button
-    html.Div([
+    # Header layout with title, button, and logos
+    header_layout = html.Div([
+        # Title and Timeline Slider button
         html.Div([
-            html.H1([
-                html.Span('Projects', style={"color": "#101010", "fontWeight": "bold"}),
-                html.Span('Timeline', style={"color": "#004DF4", "fontWeight": "bold"}),
+            html.Div([
+                html.H1([
+                    html.Span('Projects', style={"color": "#101010", "fontWeight": "bold"}),
+                    html.Span('Timeline', style={"color": "#004DF4", "fontWeight": "bold"}),
+                ], style={
+                    'fontSize': "48px",
+                    'display': 'inline-block',
+                    'verticalAlign': 'middle',
+                    'marginRight': '10px',
+                }),
+                html.Button('Timeline Slider', id='toggle-slider-button', n_clicks=0, style={
+                    'backgroundColor': '#004DF4',
+                    'color': 'white',
+                    'border': 'none',
+                    'borderRadius': '5px',
+                    'padding': '10px 20px',
+                    'fontSize': '16px',
+                    'display': 'inline-block',
+                    'verticalAlign': 'middle',
+                    'marginLeft': '10px',
+                }),
             ], style={
-                'fontSize': "48px",
-                'display': 'inline-block',
-                'verticalAlign': 'middle',
-                'marginRight': '10px',
-            }),
-            html.Button('Timeline Slider', id='toggle-slider-button', n_clicks=0, style={
-                'backgroundColor': '#004DF4',
-                'color': 'white',
-                'border': 'none',
-                'borderRadius': '5px',
-                'padding': '10px 20px',
-                'fontSize': '16px',
-                'display': 'inline-block',
-                'verticalAlign': 'middle',
-                'marginLeft': '10px',
-            }),
-        ], style={
-            'display': 'inline-block',
-            'verticalAlign': 'middle',
-        }),
-        
-        # Logos
-        html.Div([
-            html.Img(src="/assets/isavia_logo.png", style={
-                'height': '70px',  # Adjust the height to align with the text and button
-                'marginRight': '10px',
-                'filter': "grayscale(100%)",
                 'display': 'inline-block',
                 'verticalAlign': 'middle',
             }),
-            html.Img(src="/assets/KEF-EN-svart.png", style={
-                'height': '70px',  # Adjust the height to align with the text and button
-                'filter': "grayscale(100%)",
+
+            # Logos
+            html.Div([
+                html.Img(src="/assets/isavia_logo.png", style={
+                    'height': '70px',  # Adjust the height to align with the text and button
+                    'marginRight': '10px',
+                    'filter': "grayscale(100%)",
+                    'display': 'inline-block',
+                    'verticalAlign': 'middle',
+                }),
+                html.Img(src="/assets/KEF-EN-svart.png", style={
+                    'height': '70px',  # Adjust the height to align with the text and button
+                    'filter': "grayscale(100%)",
+                    'display': 'inline-block',
+                    'verticalAlign': 'middle',
+                }),
+            ], style={
                 'display': 'inline-block',
                 'verticalAlign': 'middle',
+                'float': 'right',  # Float right to align with the right edge
             }),
         ], style={
-            'display': 'inline-block',
-            'verticalAlign': 'middle',
-            'float': 'right',  # Float right to align with the right edge
+            'display': 'flex',
+            'justifyContent': 'space-between',
+            'alignItems': 'center',
+            'padding': '10px 20px',  # Add padding as needed
         }),
     ], style={
-        'display': 'flex',
-        'justifyContent': 'space-between',
-        'alignItems': 'center',
-        'padding': '10px 20px',  # Add padding as needed
-    }),
-], style={
-    'overflow': 'hidden',  # Ensure the floating elements are contained within the div
-})
-
-# Last Updated Date positioned at the bottom right of the header
-last_updated_layout = html.Div([
-    html.P("Last Updated: " + last_updated_date_str, style={
-        'textAlign': 'right',
-        'color': '#101010',
-        'fontSize': '14px',
-        'marginTop': '5px'
+        'overflow': 'hidden',  # Ensure the floating elements are contained within the div
     })
-], style={'position': 'absolute', 'top': '0px', 'right': '20px'})
-
-# The dropdowns for Stages, PMs, and Projects with spacing between them
-select_options_layout = html.Div(style={'paddingRight': '10px', 'display': 'inline-block', 'verticalAlign': 'top', 'position': 'absolute', 'right': '1%', 'top': '0', 'alignItems': 'flex-start'}, children=[
-    html.Details([
-        html.Summary('Stages:', style={'fontWeight': 'bold'}),
-        dcc.Checklist(
-            id='stage-checklist-items',
-            options=[
-                {'label': 'Stage 6', 'value': 'Stage 6'},
-                {'label': 'Stage 5', 'value': 'Stage 5'},
-                {'label': 'Procurement', 'value': 'Procurement'},
-                {'label': 'Stage 4', 'value': 'Stage 4'},
-                {'label': 'Stage 3', 'value': 'Stage 3'},
-                {'label': 'Stage 2', 'value': 'Stage 2'},
-                {'label': 'Stage 1', 'value': 'Stage 1'},
-                {'label': 'Stage 0', 'value': 'Stage 0'},
-                #{'label': 'Strategies and Plans', 'value': 'Strategies and Plans'}
-            ],
-            value=['Stage 5','Procurement','Stage 4', 'Stage 3','Stage 2','Stage 1','Stage 0','Strategies and Plans'],
-            style={"color": "black"}
-        ),
-    ], style=dict(dropdown_details_style, marginRight='10px',maxWidth='115px')),  # Added marginRight for spacing
-
-    html.Details([
-        html.Summary('Select PMs:', style={'fontWeight': 'bold'}),
-        dcc.Checklist(
-            id='pm-checklist-items',
-            options=pm_options,
-            value=[],
-            style={"color": "black"}
-        ),
-    ], style=dict(dropdown_details_style, marginRight='10px',minWidth='190px')),  # Added marginRight for spacing
-
-    html.Details([
-        html.Summary('Select Projects:', style={'fontWeight': 'bold'}),
-        dcc.Checklist(
-            id='filtered-project-list-checklist',
-            options=[],  # Initially empty, will be populated dynamically
-            value=[],
-            style={"color": "black"}
-        ),
-    ], style=dict(dropdown_details_style, minWidth='190px')),  # Added marginRight for spacing
-])
-
-#isavia blue : #4396a7 orange:#e65500
-# App layout
-app.layout = html.Div(style={'backgroundColor': 'white', 'color': '#101010', 'fontFamily': 'Arial'}, children=[
 
-    header_layout,
-    last_updated_layout,
-    
-    # Filters and sorting options
-    html.Div(style={'position': 'absolute', 'top': '130px', 'left': '1%', 'right': '1%', 'zIndex': '10'}, children=[
-        # Left-aligned options container
-        html.Div(style={'display': 'flex', 'flexWrap': 'nowrap', 'justifyContent': 'start', 'alignItems': 'flex-start', 'marginRight': '50%'}, children=[
-            # Filter by PM/Phase
-            html.Div(style={**filter_container_style, 'width':'80px','minWidth': '80px','maxWidth': '80px'}, children=[
-                html.Label('Color by:', style={'paddingRight': '0px'}),
-                dcc.RadioItems(
-                    options=[
-                        {'label': 'Stages', 'value': 'Phase'},
-                        {'label': 'PM', 'value': 'PM'}
-                    ],
-                    value='Phase',
-                    id='color-radio-items',
-                    inline=True,
-                    style={"color": "black"}
-                ),
-            ]),
-
-            # Filter by Category
-            html.Div(style={**filter_container_style, 'width': '100px', 'minWidth': '100px', 'maxWidth': '101px'}, children=[
-                html.Label('Category:', style={'paddingRight': '0px'}),
-                dcc.Checklist(
-                    id='category-checklist-items',
-                    options=[
-                        {'label': 'Projects', 'value': 'Project'},
-                        {'label': 'Strategies and Plans', 'value': 'Strategies and Plans'}
-                    ],
-                    value=['Project'],  # Provide a list with initial values
-                    style={"color": "black"}
-                ),
+    # Last Updated Date positioned at the bottom right of the header
+    last_updated_layout = html.Div([
+        html.P("Last Updated: ", id='last-updated', style={
+            'textAlign': 'right',
+            'color': '#101010',
+            'fontSize': '14px',
+            'marginTop': '5px'
+        })
+    ], style={'position': 'absolute', 'top': '0px', 'right': '20px'})
+
+    # The dropdowns for Stages, PMs, and Projects with spacing between them
+    select_options_layout = html.Div(style={'paddingRight': '10px', 'display': 'inline-block', 'verticalAlign': 'top', 'position': 'absolute', 'right': '1%', 'top': '0', 'alignItems': 'flex-start'}, children=[
+        html.Details([
+            html.Summary('Stages:', style={'fontWeight': 'bold'}),
+            dcc.Checklist(
+                id='stage-checklist-items',
+                options=[
+                    {'label': 'Stage 6', 'value': 'Stage 6'},
+                    {'label': 'Stage 5', 'value': 'Stage 5'},
+                    {'label': 'Procurement', 'value': 'Procurement'},
+                    {'label': 'Stage 4', 'value': 'Stage 4'},
+                    {'label': 'Stage 3', 'value': 'Stage 3'},
+                    {'label': 'Stage 2', 'value': 'Stage 2'},
+                    {'label': 'Stage 1', 'value': 'Stage 1'},
+                    {'label': 'Stage 0', 'value': 'Stage 0'},
+                    #{'label': 'Strategies and Plans', 'value': 'Strategies and Plans'}
+                ],
+                value=DEFAULT_VIEW['stages'],
+                style={"color": "black"}
+            ),
+        ], style=dict(dropdown_details_style, marginRight='10px',maxWidth='115px')),  # Added marginRight for spacing
+
+        html.Details([
+            html.Summary('Select PMs:', style={'fontWeight': 'bold'}),
+            dcc.Checklist(
+                id='pm-checklist-items',
+                options=[],  # Filled by update_pm_checklist
+                value=[],
+                style={"color": "black"}
+            ),
+        ], style=dict(dropdown_details_style, marginRight='10px',minWidth='190px')),  # Added marginRight for spacing
+
+        html.Details([
+            html.Summary('Select Projects:', style={'fontWeight': 'bold'}),
+            dcc.Dropdown(
+                id='filtered-project-list-checklist',
+                options=[],  # Populated with the search matches as the user types
+                value=[],
+                multi=True,
+                placeholder='Search projects...',
+                style={"color": "black"}
+            ),
+        ], style=dict(dropdown_details_style, minWidth='190px')),  # Added marginRight for spacing
+
+        html.Details([
+            html.Summary('Summary:', style={'fontWeight': 'bold'}),
+            # Projects, phases and phase-months for the checklist selections
+            html.Div(id='summary-panel', style={"color": "black", 'fontSize': '12px'}),
+        ], style=dict(dropdown_details_style, marginLeft='10px', minWidth='260px')),
+    ])
+
+    # App layout
+    return html.Div(style={'backgroundColor': 'white', 'color': '#101010', 'fontFamily': 'Arial'}, children=[
+
+        header_layout,
+        last_updated_layout,
+
+        # Filters and sorting options
+        html.Div(style={'position': 'absolute', 'top': '130px', 'left': '1%', 'right': '1%', 'zIndex': '10'}, children=[
+            # Left-aligned options container
+            html.Div(style={'display': 'flex', 'flexWrap': 'nowrap', 'justifyContent': 'start', 'alignItems': 'flex-start', 'marginRight': '50%'}, children=[
+                # Filter by PM/Phase
+                html.Div(style={**filter_container_style, 'width':'80px','minWidth': '80px','maxWidth': '80px'}, children=[
+                    html.Label('Color by:', style={'paddingRight': '0px'}),
+                    dcc.RadioItems(
+                        options=[
+                            {'label': 'Stages', 'value': 'Phase'},
+                            {'label': 'PM', 'value': 'PM'}
+                        ],
+                        value=DEFAULT_VIEW['color'],
+                        id='color-radio-items',
+                        inline=True,
+                        style={"color": "black"}
+                    ),
+                ]),
+
+                # Filter by Category
+                html.Div(style={**filter_container_style, 'width': '100px', 'minWidth': '100px', 'maxWidth': '101px'}, children=[
+                    html.Label('Category:', style={'paddingRight': '0px'}),
+                    dcc.Checklist(
+                        id='category-checklist-items',
+                        options=[
+                            {'label': 'Projects', 'value': 'Project'},
+                            {'label': 'Strategies and Plans', 'value': 'Strategies and Plans'}
+                        ],
+                        value=DEFAULT_VIEW['categories'],  # Provide a list with initial values
+                        style={"color": "black"}
+                    ),
+                ]),
+
+                # Filter Data by Department
+                html.Div(style={**filter_container_style, 'minWidth': '95px','maxWidth': '100px'}, children=[
+                    html.Label('Department:', style={'paddingRight': '0px'}),
+                    dcc.Checklist(
+                        options=[],  # Filled by select_dataset for the portfolio
+                        value=DEFAULT_VIEW['departments'],  # Default value can be set here
+                        id='department-checklist-items',
+                        style={"color": "black"}
+                    ),
+                ]),
+
+                # Filter Data by Location
+                html.Div(style={**filter_container_style, 'minWidth': '100px','maxWidth': '125px'}, children=[
+                    html.Label('Location:', style={'paddingRight': '0px'}),
+                    dcc.Checklist(
+                        options=[
+                            {'label': 'Terminals', 'value': 'Terminals'},
+                            {'label': 'Airfield', 'value': 'Airfield'},
+                            {'label': 'Landside', 'value': 'Landside'}
+                        ],
+                        value=DEFAULT_VIEW['locations'],
+                        id='location-checklist-items',
+                        style={"color": "black"}
+                    ),
+                ]),
+
+                # Filter Data by Type
+                html.Div(style={**filter_container_style, 'minWidth': '85px','maxWidth': '100px'}, children=[
+                    html.Label('Type:', style={'paddingRight': '0px'}),
+                    dcc.Checklist(
+                        options=[
+                            {'label': 'Building', 'value': 'Building'},
+                            {'label': 'Civil', 'value': 'Civil'},
+                            {'label': 'Utilities', 'value': 'Utilities'},
+                        ],
+                        value=DEFAULT_VIEW['types'],
+                        id='type-checklist-items',
+                        style={"color": "black"}
+                    ),
+                ]),
+
+                # Filter Data by Tier
+                html.Div(style={**filter_container_style, 'minWidth': '100px','maxWidth': '124px'}, children=[
+                    html.Label('Filter by Tier:', style={'paddingRight': '0px'}),
+                    dcc.Checklist(
+                        options=[
+                            {'label': 'Tier 1', 'value': '1'},
+                            {'label': 'Tier 2', 'value': '2'},
+                            {'label': 'Tier 3', 'value': '3'}
+                        ],
+                        value=DEFAULT_VIEW['tiers'],
+                        id='tier-checklist-items',
+                        style={"color": "black"}
+                    ),
+                ]),
+
+                # Sorting dropdown
+                html.Div(style={
+                        'display': 'flex',
+                        'flexDirection': 'column',
+                        'justifyContent': 'flex-start',  # Align items to the top
+                        'paddingRight': '10px',
+                        'minWidth': '170px',
+                        #'maxWidth': '120px'
+                    }, children=[
+                    html.Label('Sort Projects By:', style={'paddingRight': '10px'}),
+                    dcc.Dropdown(
+                        id='sort-dropdown',
+                        options=[
+                            {'label': 'Project Start', 'value': 'Project_Start'},
+                            {'label': 'Project Finish', 'value': 'Project_Finish'},
+                            {'label': 'Start of Stage 3', 'value': 'Stage_3_Start'},  
+                            {'label': 'Start of Procurement', 'value': 'Procurement_Start'},  
+                            {'label': 'Start of Construction', 'value': 'Stage_5_Start'},
+                            {'label': 'Project Manager (PM)', 'value': 'PM'},
+                            {'label': 'Alphabetically', 'value': 'Task'},
+                        ],
+                        value=DEFAULT_VIEW['sort'],
+                        clearable=False,
+                        style={"width": "100%"}
+                    ),
+                ]),
             ]),
 
-            # Filter Data by Department
-            html.Div(style={**filter_container_style, 'minWidth': '95px','maxWidth': '100px'}, children=[
-                html.Label('Department:', style={'paddingRight': '0px'}),
-                dcc.Checklist(
-                    options=[{'label': department, 'value': department} for department in sorted(df['Department'].unique())],
-                    value=['FUPP'],  # Default value can be set here
-                    id='department-checklist-items',
-                    style={"color": "black"}
-                ),
-            ]),
+            select_options_layout,
 
-            # Filter Data by Location
-            html.Div(style={**filter_container_style, 'minWidth': '100px','maxWidth': '125px'}, children=[
-                html.Label('Location:', style={'paddingRight': '0px'}),
-                dcc.Checklist(
-                    options=[
-                        {'label': 'Terminals', 'value': 'Terminals'},
-                        {'label': 'Airfield', 'value': 'Airfield'},
-                        {'label': 'Landside', 'value': 'Landside'}
-                    ],
-                    value=['Terminals', 'Airfield','Landside'],
-                    id='location-checklist-items',
-                    style={"color": "black"}
-                ),
-            ]),
-
-            # Filter Data by Type
-            html.Div(style={**filter_container_style, 'minWidth': '85px','maxWidth': '100px'}, children=[
-                html.Label('Type:', style={'paddingRight': '0px'}),
-                dcc.Checklist(
-                    options=[
-                        {'label': 'Building', 'value': 'Building'},
-                        {'label': 'Civil', 'value': 'Civil'},
-                        {'label': 'Utilities', 'value': 'Utilities'},
-                    ],
-                    value=['Building', 'Civil','Utilities'],
-                    id='type-checklist-items',
-                    style={"color": "black"}
-                ),
-            ]),
-
-            # Filter Data by Tier
-            html.Div(style={**filter_container_style, 'minWidth': '100px','maxWidth': '124px'}, children=[
-                html.Label('Filter by Tier:', style={'paddingRight': '0px'}),
-                dcc.Checklist(
-                    options=[
-                        {'label': 'Tier 1', 'value': '1'},
-                        {'label': 'Tier 2', 'value': '2'},
-                        {'label': 'Tier 3', 'value': '3'}
-                    ],
-                    value=['1', '2', '3'],
-                    id='tier-checklist-items',
-                    style={"color": "black"}
-                ),
-            ]),
-
-            # Sorting dropdown
-            html.Div(style={
-                    'display': 'flex',
-                    'flexDirection': 'column',
-                    'justifyContent': 'flex-start',  # Align items to the top
-                    'paddingRight': '10px',
-                    'minWidth': '170px',
-                    #'maxWidth': '120px'
-                }, children=[
-                html.Label('Sort Projects By:', style={'paddingRight': '10px'}),
-                dcc.Dropdown(
-                    id='sort-dropdown',
-                    options=[
-                        {'label': 'Project Start', 'value': 'Project_Start'},
-                        {'label': 'Project Finish', 'value': 'Project_Finish'},
-                        {'label': 'Start of Stage 3', 'value': 'Stage_3_Start'},  
-                        {'label': 'Start of Procurement', 'value': 'Procurement_Start'},  
-                        {'label': 'Start of Construction', 'value': 'Stage_5_Start'},
-                        {'label': 'Project Manager (PM)', 'value': 'PM'},
-                        {'label': 'Alphabetically', 'value': 'Task'},
-                    ],
-                    value='Project_Start',
-                    clearable=False,
-                    style={"width": "100%"}
-                ),
-            ]),
         ]),
 
-        select_options_layout,
+        # Visible x range of the chart, None when autoranged
+        dcc.Store(id='zoom-store'),
+        # The page URL, which names the portfolio to show
+        dcc.Location(id='url', refresh=False),
+        # Name of the portfolio this page shows
+        dcc.Store(id='dataset-name-store'),
+        # The encoded dataset for the clientside callbacks, empty unless FUPP_CLIENTSIDE=1
+        dcc.Store(id='dataset-store'),
+
+        # New Div for spacing
+        html.Div(style={'height': '50pt','zIndex': '1'}),
+
+        # Graph container with lower z-index
+        dcc.Graph(id='gantt-chart-placeholder', style={
+            #"height": "1500px",
+            "backgroundColor": "#4396a7",
+            'zIndex': '2'
+        },
+            config={
+                'toImageButtonOptions': {
+                    'format': 'png',  # One of png, svg, jpeg, webp
+                    'filename': 'FUPP_Timeline_snapshot',
+                    #'scale': 1  # Multiply title/legend/axis/canvas sizes by this factor
+                }
+            }
+        ),
+    ])
 
-    ]),
+app.layout = serve_layout
 
-    dcc.Store(id='graph-container-height-store'),
 
-    # New Div for spacing
-    html.Div(style={'height': '50pt','zIndex': '1'}),
-
-    # Graph container with lower z-index
-    dcc.Graph(id='gantt-chart-placeholder', style={
-        #"height": "1500px",
-        "backgroundColor": "#4396a7",
-        'zIndex': '2'
-    },
-        config={
-            'toImageButtonOptions': {
-                'format': 'png',  # One of png, svg, jpeg, webp
-                'filename': 'FUPP_Timeline_snapshot',
-                #'scale': 1  # Multiply title/legend/axis/canvas sizes by this factor
-            }
-        }
-    ),
-])
+# Decorator registering a callback on the server or, in clientside mode, the engine function of the same name
+# The clientside functions get the dataset store as an extra last argument
+def gantt_callback(output, inputs, state=None, prevent_initial_call=None):
+    def decorator(func):
+        if CLIENTSIDE_MODE:
+            app.clientside_callback(ClientsideFunction(namespace='fupp', function_name=func.__name__),
+                                    output, inputs, (state or []) + [State('dataset-store', 'data')],
+                                    prevent_initial_call=prevent_initial_call)
+        else:
+            app.callback(output, inputs, state or [], prevent_initial_call=prevent_initial_call)(func)
+        return func
+    return decorator
 
 # Refactored function for filtering DataFrame
 # Refactored function for filtering DataFrame
@@ -496,35 +811,37 @@ def aggregate_and_merge_data(filtered_df):
 
 
 # Function for sorting DataFrame
+# The sort is stable so tied rows keep their order, the clientside engine sorts the same way
 def sort_dataframe(filtered_df, sort_column):
     if sort_column == 'Task':
-        sorted_df = filtered_df.sort_values(by=sort_column, ascending=False)
+        sorted_df = filtered_df.sort_values(by=sort_column, ascending=False, kind='mergesort')
     else:
-        sorted_df = filtered_df.sort_values(by=sort_column, ascending=False, na_position='first')
+        sorted_df = filtered_df.sort_values(by=sort_column, ascending=False, na_position='first', kind='mergesort')
     return sorted_df.reset_index(drop=True)
 
+# Function to build the 'RolesInfo' hover text, e.g. "PML: Jón DM: Anna"
 def create_roles_info(df):
     # Define the roles we are interested in
     roles = ['PML', 'DM', 'PM1', 'PM2']
-    
+
     # Initialize the 'RolesInfo' column with empty strings
-    df['RolesInfo'] = ''
-    
-    for index, row in df.iterrows():
-        roles_info_list = []
-        for role in roles:
-            # Check if the role column is not NaN and not 'Unknown'
-            if pd.notna(row[role]) and row[role] != 'Unknown PM':
-                # Append the role info to the list
-                roles_info_list.append(f"{role}: {row[role]}")
-        
+    if df.empty:
+        df['RolesInfo'] = ''
+        return df
+
+    roles_info = np.full(len(df), '', dtype=object)
+    for role in roles:
+        # Build "role: name" once per distinct name, '' where the role is NaN or 'Unknown'
+        codes, uniques = pd.factorize(df[role])
+        labels = np.array([f"{role}: {name}" if name != 'Unknown PM' else '' for name in uniques] + [''], dtype=object)
+        role_info = labels[codes]
+
         # Join all the role info strings with a space
-        df.at[index, 'RolesInfo'] = ' '.join(roles_info_list)
-    
-    return df
+        both = (roles_info != '') & (role_info != '')
+        roles_info = np.where(both, roles_info + ' ' + role_info, roles_info + role_info)
 
-# Apply the function to the DataFrame
-df = create_roles_info(df)
+    df['RolesInfo'] = roles_info
+    return df
 
 # Function to create Gantt Chart
 def create_gantt_chart(sorted_df, color_column, task_order, pm_colors, phase_colors, graph_container_height):
@@ -541,6 +858,9 @@ def create_gantt_chart(sorted_df, color_column, task_order, pm_colors, phase_col
     if sorted_df.empty:
         return None
 
+    # plotly.express is only imported once a chart is actually drawn
+    import plotly.express as px
+
     # Create the Plotly timeline
     if color_column == 'PM':
         fig = px.timeline(sorted_df, x_start="Start", x_end="Finish", y="Task",
@@ -633,70 +953,303 @@ def add_current_date_line(fig):
 # Function to toggle range slider visibility
 def toggle_range_slider(fig, n_clicks):
     fig.update_layout(xaxis_rangeslider_visible=(n_clicks % 2 == 1))
-    
+
+
+# Function to keep the rows whose bars overlap the visible x range
+def visible_rows(df, x_range):
+    if not x_range:
+        return df
+    start, finish = pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+    return df[(df['Finish'] >= start) & (df['Start'] <= finish)]
+
+
+# Function to collapse the phases of each project into one bar spanning Project_Start to Project_Finish
+# The bar takes the colour of the project's latest phase; rows keep the current sort order
+def roll_up_projects(sorted_df):
+    latest_phase = sorted_df.sort_values('Start', kind='mergesort').groupby('Task')['Phase'].last()
+    projects = sorted_df.drop_duplicates('Task').copy()
+    projects['Start'] = projects['Project_Start']
+    projects['Finish'] = projects['Project_Finish']
+    projects['Phase'] = projects['Task'].map(latest_phase)
+    return projects.reset_index(drop=True)
+
+
+# Function to collapse projects into one summary bar per Department / Location
+def roll_up_departments(sorted_df):
+    groups = ['Department', 'Location']
+    summary = sorted_df.groupby(groups, sort=False).agg(Start=('Start', 'min'), Finish=('Finish', 'max'), Projects=('Task', 'nunique')).reset_index()
+    latest_phase = sorted_df.sort_values('Start', kind='mergesort').groupby(groups)['Phase'].last().rename('Phase').reset_index()
+    summary = summary.merge(latest_phase, on=groups, how='left')
+    summary['Task'] = summary['Department'] + ' / ' + summary['Location']
+    summary['Type'] = summary['Projects'].astype(str) + ' projects'
+    summary['PM'] = 'Unknown PM'
+    summary['Tier'] = ''
+    summary['RolesInfo'] = ''
+    return summary
+
+
+# Function to pick the level of detail for the visible range, returns the rows to draw and the level used
+# Small portfolios always get the full per-phase chart; larger ones fall back to coarser bars until the view fits
+def apply_level_of_detail(sorted_df, x_range):
+    if len(sorted_df) <= MAX_PHASE_BARS:
+        return sorted_df, 'phases'
+    phases = visible_rows(sorted_df, x_range)
+    if len(phases) <= MAX_PHASE_BARS:
+        return phases, 'visible phases'
+    projects = visible_rows(roll_up_projects(sorted_df), x_range)
+    if len(projects) <= MAX_PROJECT_BARS:
+        return projects, 'projects'
+    return visible_rows(roll_up_departments(sorted_df), x_range), 'departments'
+
+
+# Function to tell whether the running callback was triggered by zooming alone
+def triggered_by_zoom():
+    try:
+        return ctx.triggered_id == 'zoom-store'
+    except Exception:
+        # Called outside a request, e.g. by the start-up warm-up
+        return False
+
+
+# Function to turn callback arguments (lists, dicts) into a hashable cache key
+def freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+# Decorator that caches a callback's results per set of inputs (and per day, as figures carry a "Today" line)
+# Figures are stored already converted to plain dicts so a hit skips plotly's validation entirely
+# The first argument names the portfolio; the cache lives on its Dataset and goes when the portfolio is evicted
+def memoize_callback(maxsize=128):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(dataset_name, *args):
+            dataset = get_dataset(dataset_name)
+            key = (datetime.now().date(), freeze(args))
+            with dataset.caches_lock:
+                cache = dataset.caches.setdefault(func.__name__, OrderedDict())
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key][0]
+            # Computed outside the lock, two requests for the same new key may both compute it
+            result = func(dataset_name, *args)
+            if isinstance(result, tuple):
+                result = tuple(value.to_dict() if hasattr(value, 'to_dict') else value for value in result)
+            elif hasattr(result, 'to_dict'):
+                result = result.to_dict()
+            # The size counts towards the portfolio's footprint, so FUPP_DATASET_MEMORY_MB bounds the caches too
+            size = object_bytes(result)
+            with dataset.caches_lock:
+                cache[key] = (result, size)
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            with _datasets_lock:
+                if _datasets.get(dataset.name) is dataset:
+                    evict_datasets(keep=dataset.name)
+            return result
+
+        return wrapper
+    return decorator
+
+# Function to list the places a search may match a name: its start and the start of every later word
+def word_suffixes(name):
+    lower = name.lower()
+    return [lower] + [lower[m.end():] for m in re.finditer(r'[\s\-/&(]+', lower) if m.end() < len(lower)]
+
+
+# Function returning the projects that match the filters, with a search index over their names
+@memoize_callback()
+def get_project_index(dataset_name, selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_pms, selected_category):
+    filtered_df = filter_dataframe(get_data(dataset_name), selected_departments, selected_tiers, selected_locations, selected_types, selected_stages, selected_category)
+    # Further filter based on selected PMs
+    if selected_pms:
+        filtered_df = filtered_df[filtered_df['PM'].isin(selected_pms)]
+
+    names = sorted(filtered_df['Task'].unique())
+    return {
+        'names': names,
+        'lower': [name.lower() for name in names],
+        # Word-start suffixes of every name, sorted so prefix matches can be found by binary search
+        'words': sorted((suffix, position) for position, name in enumerate(names) for suffix in word_suffixes(name)),
+    }
+
+
+# Function to find up to `limit` project names for a query
+# Names starting with the query come first, then names with a word starting with it, then any other substring match
+def search_project_index(index, query, limit):
+    names = index['names']
+    query = (query or '').strip().lower()
+    if not query:
+        return names[:limit]
+
+    words = index['words']
+    found = set()
+    i = bisect.bisect_left(words, (query,))
+    while i < len(words) and words[i][0].startswith(query):
+        found.add(words[i][1])
+        i += 1
+    ranked = sorted(found, key=lambda position: (not index['lower'][position].startswith(query), position))[:limit]
+
+    if len(ranked) < limit:
+        for position, lower in enumerate(index['lower']):
+            if position not in found and query in lower:
+                ranked.append(position)
+                if len(ranked) == limit:
+                    break
+    return [names[position] for position in ranked]
+
+
+# Callback to pick the portfolio named by the page URL and fill in its options
+# Departments start from the default selection, limited to the ones the portfolio has
 @app.callback(
+    [
+        Output('dataset-name-store', 'data'),
+        Output('dataset-store', 'data'),
+        Output('last-updated', 'children'),
+        Output('department-checklist-items', 'options'),
+        Output('department-checklist-items', 'value'),
+    ],
+    [Input('url', 'pathname'), Input('url', 'search')]
+)
+def select_dataset(pathname, search):
+    dataset = get_dataset(dataset_from_url(pathname, search))
+    options = dataset.layout_options()
+    departments = [option['value'] for option in options['departments']]
+    return (
+        dataset.name,
+        dataset.client_dataset() if CLIENTSIDE_MODE else None,
+        "Last Updated: " + options['last_updated'],
+        options['departments'],
+        [department for department in DEFAULT_VIEW['departments'] if department in departments],
+    )
+
+
+@gantt_callback(
     Output('filtered-project-list-checklist', 'options'),
     [
+        Input('dataset-name-store', 'data'),
+        Input('filtered-project-list-checklist', 'search_value'),
         Input('department-checklist-items', 'value'),
         Input('location-checklist-items', 'value'),
         Input('type-checklist-items', 'value'),
         Input('tier-checklist-items', 'value'),
         Input('stage-checklist-items', 'value'),
         Input('pm-checklist-items', 'value'),
-        Input('category-checklist-items', 'value')  # New input for category
-    ]
+        Input('category-checklist-items', 'value')
+    ],
+    [State('filtered-project-list-checklist', 'value')]
 )
-
-def update_filtered_project_checklist(selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_pms, selected_category):
-    print("Callback Triggered: update_filtered_project_checklist")  # Debugging statement
-    # Perform filtering
-    filtered_df = filter_dataframe(df, selected_departments, selected_tiers, selected_locations, selected_types, selected_stages, selected_category)    
-    # Further filter based on selected PMs
-    if selected_pms:
-        filtered_df = filtered_df[filtered_df['PM'].isin(selected_pms)]
-
-    # If no data to display after filters, prevent the update
-    if filtered_df.empty:
-        raise PreventUpdate
-
-    # Create project checklist options based on the filtered dataframe
-    project_checklist_options = [{'label': project, 'value': project} for project in sorted(filtered_df['Task'].unique())]
-
-    return project_checklist_options
-
-@app.callback(
-    Output('gantt-chart-placeholder', 'style'),
-    [Input('filtered-project-list-checklist', 'options')]
-)
-def update_graph_container_height(selected_projects):
+@memoize_callback()
+def search_projects(dataset_name, search_value, selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_pms, selected_category, selected_projects):
+    index = get_project_index(dataset_name, selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_pms, selected_category)
+    matches = search_project_index(index, search_value, PROJECT_SEARCH_LIMIT)
+
+    # Keep the selected projects in the options so the dropdown can still show them
+    selected_projects = selected_projects or []
+    names = selected_projects + [name for name in matches if name not in selected_projects]
+    return [{'label': name, 'value': name} for name in names]
+
+# Function to size the chart for the rows it draws, at whatever level of detail update_graph picked
+def get_graph_container_height(row_count):
     # Set a minimum height
     min_height = 850
 
-    # Calculate the height based on the number of projects (18px per project)
-    height_per_project = 25
-    dynamic_height = max(min_height, len(selected_projects) * height_per_project)
+    # Calculate the height based on the number of rows drawn (25px per row)
+    height_per_row = 25
+    return max(min_height, row_count * height_per_row)
 
-    # Return the updated style dictionary with the new height
+# Function to build the chart's style for a height
+def graph_container_style(height):
     return {
-        "height": f"{dynamic_height}px",
+        "height": f"{height}px",
         "backgroundColor": "#4396a7",
         'zIndex': '2'
     }
 
-@app.callback(
-    Output('graph-container-height-store', 'data'),
-    [Input('filtered-project-list-checklist', 'options')]
+# Function to apply the PM and project checklists on top of filter_dataframe, as the chart does
+def filter_pms_and_projects(filtered_df, selected_pms, filtered_projects):
+    # Filter based on selected PMs (include PM, PML, DM, PM1, PM2)
+    if selected_pms:
+        pm_filter = (filtered_df['PM'].isin(selected_pms) | 
+                     filtered_df['PML'].isin(selected_pms) | 
+                     filtered_df['DM'].isin(selected_pms) | 
+                     filtered_df['PM1'].isin(selected_pms) | 
+                     filtered_df['PM2'].isin(selected_pms))
+        filtered_df = filtered_df[pm_filter]
+
+    if 'Unknown PM' in selected_pms:
+        pm_filter = (filtered_df['PM'] == 'Unknown PM')
+        filtered_df = filtered_df[pm_filter]
+
+    # Further filter the dataframe based on selected projects from the filtered checklist
+    if filtered_projects:
+        filtered_df = filtered_df[filtered_df['Task'].isin(filtered_projects)]
+    return filtered_df
+
+# The summary panel's rows: the overall totals, then per Department and per Phase
+SUMMARY_GROUPS = [None, 'Department', 'Phase']
+
+# Function to lay out one row of the summary table
+def summary_row(label, totals, style=None):
+    cells = [label, totals['projects'], totals['phases'], f"{totals['phase_months']:.1f}"]
+    return html.Tr([html.Td(cell, style={'padding': '0 4px'}) for cell in cells], style=style)
+
+
+# Callback to fill the summary panel with the same selection as the chart
+# The checklists that filter_dataframe covers are answered from the pre-aggregated cube; a PM or project selection
+# cuts across its cells, so then the summary comes from the filtered rows instead
+@gantt_callback(
+    Output('summary-panel', 'children'),
+    [
+        Input('dataset-name-store', 'data'),
+        Input('department-checklist-items', 'value'),
+        Input('location-checklist-items', 'value'),
+        Input('type-checklist-items', 'value'),
+        Input('tier-checklist-items', 'value'),
+        Input('stage-checklist-items', 'value'),
+        Input('pm-checklist-items', 'value'),
+        Input('filtered-project-list-checklist', 'value'),
+        Input('category-checklist-items', 'value')
+    ]
 )
-def get_graph_container_height(selected_projects):
-    # Set a minimum height
-    min_height = 850
+@memoize_callback()
+def update_summary(dataset_name, selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_pms, selected_projects, selected_categories):
+    if selected_pms or selected_projects:
+        filtered_df = filter_dataframe(get_data(dataset_name), selected_departments, selected_tiers, selected_locations, selected_types, selected_stages, selected_categories)
+        filtered_df = filter_pms_and_projects(filtered_df, selected_pms or [], selected_projects)
+        summaries = [summarize_frame(filtered_df, by) for by in SUMMARY_GROUPS]
+    else:
+        cells = select_cells(get_dataset(dataset_name).summary_cube(), selected_departments, selected_tiers, selected_locations, selected_types, selected_stages, selected_categories)
+        summaries = [summarize_cells(cells, by) for by in SUMMARY_GROUPS]
+    header = html.Tr([html.Th(title, style={'padding': '0 4px'}) for title in ['', 'Projects', 'Phases', 'Phase-months']])
+    rows = [summary_row('All', summaries[0], style={'fontWeight': 'bold'})]
+    for summary in summaries[1:]:
+        rows += [summary_row(value, totals) for value, totals in summary.items()]
+    return html.Table([header] + rows)
+
+# Callback to keep the visible x range of the chart, ignoring relayout events that do not change it
+@gantt_callback(
+    Output('zoom-store', 'data'),
+    [Input('gantt-chart-placeholder', 'relayoutData')],
+    prevent_initial_call=True
+)
+def update_zoom(relayout_data):
+    if not relayout_data:
+        raise PreventUpdate
+    if relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data:
+        return {'range': [relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']]}
+    if 'xaxis.range' in relayout_data:
+        return {'range': list(relayout_data['xaxis.range'])}
+    raise PreventUpdate
 
-    # Calculate the height based on the number of projects (18px per project)
-    height_per_project = 25
-    dynamic_height = max(min_height, len(selected_projects) * height_per_project)
-    return {"height": dynamic_height}
 # Callback to update the checklist value
-@app.callback(
+@gantt_callback(
     Output('stage-checklist-items', 'value'),
     [Input('stage-checklist-items', 'value')],
     [State('stage-checklist-items', 'value')]
@@ -707,9 +1260,10 @@ def ensure_strategies_and_plans(selected_stages, current_value):
         selected_stages.append('Strategies and Plans')
     return selected_stages
 
-@app.callback(
+@gantt_callback(
     Output('pm-checklist-items', 'options'),
     [
+        Input('dataset-name-store', 'data'),
         Input('department-checklist-items', 'value'), 
         Input('location-checklist-items', 'value'),
         Input('type-checklist-items', 'value'),
@@ -719,9 +1273,10 @@ def ensure_strategies_and_plans(selected_stages, current_value):
         # No need to include the PM checklist itself as an input, to avoid circular updates
     ]
 )
-def update_filtered_project_checklist(selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_categories):
+@memoize_callback()
+def update_pm_checklist(dataset_name, selected_departments, selected_locations, selected_types, selected_tiers, selected_stages, selected_categories):
     # Perform filtering based on the checklist values
-    filtered_df = filter_dataframe(df, selected_departments, selected_tiers, selected_locations, selected_types, selected_stages, selected_categories)
+    filtered_df = filter_dataframe(get_data(dataset_name), selected_departments, selected_tiers, selected_locations, selected_types, selected_stages, selected_categories)
 
     # Combine all PM related columns into a single Series and remove 'Unknown'
     all_pm_names = pd.Series(pd.concat([filtered_df['PM'], filtered_df['PML'], filtered_df['DM'], filtered_df['PM1'], filtered_df['PM2']], ignore_index=True))
@@ -732,11 +1287,12 @@ def update_filtered_project_checklist(selected_departments, selected_locations,
 
     return pm_options
 
-@app.callback(
-    Output('gantt-chart-placeholder', 'figure'),
+# The chart and its height go out together, as the height follows the rows drawn at the chosen level of detail
+@gantt_callback(
+    [Output('gantt-chart-placeholder', 'figure'), Output('gantt-chart-placeholder', 'style')],
     [
+        Input('dataset-name-store', 'data'),
         Input('color-radio-items', 'value'),
-        Input('graph-container-height-store', 'data'),
         Input('department-checklist-items', 'value'), 
         Input('location-checklist-items', 'value'),
         Input('type-checklist-items', 'value'),
@@ -746,36 +1302,22 @@ def update_filtered_project_checklist(selected_departments, selected_locations,
         Input('toggle-slider-button', 'n_clicks'),
         Input('sort-dropdown', 'value'),
         Input('filtered-project-list-checklist', 'value'),  # New input for the filtered project list
-        Input('category-checklist-items', 'value')  # New input for category
+        Input('category-checklist-items', 'value'),  # New input for category
+        Input('zoom-store', 'data')
     ]
 )
-def update_graph(color_column, graph_container_height_data, selected_departments, selected_location_categories, selected_types, selected_tiers, selected_stages, selected_pms, n_clicks, sort_column, filtered_projects,selected_categories):
+@memoize_callback()
+def update_graph(dataset_name, color_column, selected_departments, selected_location_categories, selected_types, selected_tiers, selected_stages, selected_pms, n_clicks, sort_column, filtered_projects,selected_categories, zoom_data=None):
     # Proceed with filtering if location categories are selected
     if not selected_location_categories:
-        return go.Figure()
+        return go.Figure(), graph_container_style(get_graph_container_height(0))
 
     # Filter the DataFrame based on the selected filters
-    filtered_df = filter_dataframe(df, selected_departments, selected_tiers, selected_location_categories, selected_types, selected_stages, selected_categories)
+    filtered_df = filter_dataframe(get_data(dataset_name), selected_departments, selected_tiers, selected_location_categories, selected_types, selected_stages, selected_categories)
     #print(f"Filtered Data: {filtered_df.head()}")  # Debugging statement
 
 
-    # Filter based on selected PMs (include PM, PML, DM, PM1, PM2)
-    if selected_pms:
-        pm_filter = (filtered_df['PM'].isin(selected_pms) | 
-                     filtered_df['PML'].isin(selected_pms) | 
-                     filtered_df['DM'].isin(selected_pms) | 
-                     filtered_df['PM1'].isin(selected_pms) | 
-                     filtered_df['PM2'].isin(selected_pms))
-        filtered_df = filtered_df[pm_filter]
-
-    if 'Unknown PM' in selected_pms:
-        pm_filter = (filtered_df['PM'] == 'Unknown PM')
-        selected_pms = [pm for pm in selected_pms if pm != 'Unknown PM']  # Remove 'Unknown PM' from the list for further processing
-        filtered_df = filtered_df[pm_filter]
-
-    # Further filter the dataframe based on selected projects from the filtered checklist
-    if filtered_projects:
-        filtered_df = filtered_df[filtered_df['Task'].isin(filtered_projects)]
+    filtered_df = filter_pms_and_projects(filtered_df, selected_pms, filtered_projects)
 
     # Aggregate and merge data
     filtered_df = aggregate_and_merge_data(filtered_df)
@@ -785,18 +1327,31 @@ def update_graph(color_column, graph_container_height_data, selected_departments
     sorted_df = sort_dataframe(filtered_df, sort_column)
     #print(f"Sorted Data for Chart: {sorted_df.head()}")  # Debugging statement
 
+    # Roll phases up into project or Department / Location bars when the visible range holds too many
+    x_range = zoom_data['range'] if zoom_data else None
+    sorted_df, level = apply_level_of_detail(sorted_df, x_range)
+    if level == 'phases' and triggered_by_zoom():
+        # The full chart is already drawn, plotly zooms it on the client
+        raise PreventUpdate
+
     # Determine the order of tasks
     task_order = sorted_df['Task'].unique().tolist()
     task_order.reverse()
     
-    # Create the Gantt chart
-    graph_container_height = graph_container_height_data['height'] if graph_container_height_data else 800  # default if data is None
+    # Create the Gantt chart, sized for the rows it draws
+    graph_container_height = get_graph_container_height(len(task_order))
     fig = create_gantt_chart(sorted_df, color_column, task_order, pm_colors, phase_colors, graph_container_height)
 
     # Add current date line and toggle range slider if the figure is not None
     if fig is not None:
         add_current_date_line(fig)
         toggle_range_slider(fig, n_clicks)
+        if level != 'phases':
+            # Redrawn for a zoom level, keep the range the user is looking at
+            if x_range:
+                fig.update_layout(xaxis_range=x_range)
+            if level in ('projects', 'departments'):
+                fig.update_layout(title=f"One bar per {'project' if level == 'projects' else 'Department / Location'}, zoom in for phase detail")
         #print("Gantt Chart Created")  # Debugging statement
 
     # If there's no data to display after filtering
@@ -805,11 +1360,41 @@ def update_graph(color_column, graph_container_height_data, selected_departments
         fig.update_layout(title="No Data to Display")
         #print("Gantt Chart is None, no data to display")  # Debugging statement
 
-    return fig
-
+    return fig, graph_container_style(graph_container_height)
+
+
+# Function to precompute the options lists and figures for the popular filter presets of one portfolio
+def warm_cache(dataset_name=DEFAULT_DATASET, presets=WARMUP_PRESETS):
+    started = time.perf_counter()
+    for preset in presets:
+        view = dict(DEFAULT_VIEW, **preset)
+        filters = (view['departments'], view['locations'], view['types'], view['tiers'], view['stages'])
+        search_projects(dataset_name, None, *filters, view['pms'], view['categories'], [])
+        update_pm_checklist(dataset_name, *filters, view['categories'])
+        update_summary(dataset_name, *filters, view['pms'], [], view['categories'])
+        update_graph(dataset_name, view['color'], view['departments'], view['locations'], view['types'], view['tiers'],
+                     view['stages'], view['pms'], 0, view['sort'], [], view['categories'], None)
+    print(f"Warmed {len(presets)} filter preset(s) of portfolio {dataset_name} in {time.perf_counter() - started:.2f}s")
+
+# Function to warm up the default portfolio before a server process accepts requests, the other portfolios are
+# loaded when first asked for. Not run at import so importing stays cheap: the dev server below calls it, gunicorn
+# workers call it from the post_worker_init hook in gunicorn.conf.py. Set FUPP_WARMUP=0 to skip it
+def warm_up():
+    if os.environ.get('FUPP_WARMUP', '1') == '0' or get_data().empty:
+        return
+    if CLIENTSIDE_MODE:
+        # The filtering callbacks and the summary run in the browser, only the encoded dataset is worth preparing
+        get_dataset().layout_options()
+        get_dataset().client_dataset()
+    else:
+        warm_cache()
 
 # This is just for demonstration, you can integrate it with your main app script.
 if __name__ == '__main__':
+    # debug=True starts the reloader, which re-runs this script in the child process that serves the requests
+    # (WERKZEUG_RUN_MAIN is set there), so only that process is warmed up
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up()
     app.run_server(debug=True)
     #app.run_server(debug=True, host='0.0.0.0')
 
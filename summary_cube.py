@@ -0,0 +1,100 @@
+import operator
+from functools import reduce
+import numpy as np
+import pandas as pd
+
+# Pre-aggregated portfolio counts for the summary panel
+# One cell per combination of the columns filter_dataframe filters on, so a checklist selection is answered
+# from the matching cells instead of scanning the rows.
+SUMMARY_DIMENSIONS = ['Category', 'Department', 'Location', 'Type', 'Tier', 'Phase']
+# Phase-months are phase-days over the average month length
+DAYS_PER_MONTH = 365.25 / 12
+
+
+# Function to count the whole days each phase lasts, phases without both dates count 0
+def phase_days(df):
+    return (df['Finish'] - df['Start']).dt.days.fillna(0).astype('int64')
+
+
+# Function to build the cube for one version of the dashboard data
+# Each cell holds its phase count, its phase-days and the projects it touches as a bitmask
+# (bit n set for the n-th distinct Task), so distinct projects can be combined across cells exactly
+def build_summary_cube(df):
+    task_codes, tasks = pd.factorize(df['Task'])
+    rows = df[SUMMARY_DIMENSIONS].copy()
+    rows['task'] = task_codes
+    rows['days'] = phase_days(df).to_numpy()
+
+    grouped = rows.groupby(SUMMARY_DIMENSIONS, dropna=False, sort=False)
+    cells = grouped.agg(phases=('task', 'size'), phase_days=('days', 'sum')).reset_index()
+    # Masks are built from packed bits, pandas aggregations cannot hold integers this large
+    masks = np.zeros(len(cells), dtype=object)
+    for cell, codes in rows['task'].groupby(grouped.ngroup().to_numpy()):
+        bits = np.zeros(len(tasks), dtype=bool)
+        bits[codes.to_numpy()] = True
+        masks[cell] = int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+    cells['projects'] = pd.Series(masks, index=cells.index, dtype=object)
+    return {'cells': cells, 'tasks': list(tasks)}
+
+
+# Function to pick the cells matching a selection, with the same arguments and rules as filter_dataframe
+def select_cells(cube, selected_departments, selected_tiers, selected_location_categories, selected_types, selected_stages, selected_category):
+    cells = cube['cells']
+    keep = np.ones(len(cells), dtype=bool)
+    selected_tiers = [int(tier) for tier in selected_tiers]
+    for column, selected in (('Category', selected_category), ('Department', selected_departments),
+                             ('Location', selected_location_categories), ('Type', selected_types),
+                             ('Tier', selected_tiers), ('Phase', selected_stages)):
+        if selected:
+            keep &= cells[column].isin(selected).to_numpy()
+    return cells[keep]
+
+
+def _totals(phases, days, projects):
+    return {'projects': projects, 'phases': int(phases), 'phase_days': int(days), 'phase_months': int(days) / DAYS_PER_MONTH}
+
+
+# Function to total the selected cells, overall or per value of one dimension
+def summarize_cells(cells, by=None):
+    if by is None:
+        mask = reduce(operator.or_, cells['projects'], 0)
+        return _totals(cells['phases'].sum(), cells['phase_days'].sum(), mask.bit_count())
+    summary = {}
+    for value, group in cells.groupby(by, sort=True):
+        mask = reduce(operator.or_, group['projects'], 0)
+        summary[value] = _totals(group['phases'].sum(), group['phase_days'].sum(), mask.bit_count())
+    return summary
+
+
+# Function computing the same summary straight from a filtered frame, the reference the cube must agree with
+def summarize_frame(filtered_df, by=None):
+    if by is None:
+        return _totals(len(filtered_df), phase_days(filtered_df).sum(), filtered_df['Task'].nunique())
+    summary = {}
+    for value, group in filtered_df.groupby(by, sort=True):
+        summary[value] = _totals(len(group), phase_days(group).sum(), group['Task'].nunique())
+    return summary
+
+
+# Checks the cube against a groupby on the filtered frame for random checklist selections
+#   python summary_cube.py
+if __name__ == '__main__':
+    import random
+    from make_Gantt import get_data, filter_dataframe
+
+    df = get_data()
+    cube = build_summary_cube(df)
+    rng = random.Random(0)
+    choices = {column: sorted(df[column].unique(), key=str) for column in SUMMARY_DIMENSIONS}
+    mismatches = 0
+    for _ in range(200):
+        picked = {column: rng.sample(values, rng.randint(0, len(values))) for column, values in choices.items()}
+        selection = (picked['Department'], [str(tier) for tier in picked['Tier']], picked['Location'],
+                     picked['Type'], picked['Phase'], picked['Category'])
+        cells = select_cells(cube, *selection)
+        filtered_df = filter_dataframe(df, *selection)
+        for by in (None, 'Phase', 'Department'):
+            if summarize_cells(cells, by) != summarize_frame(filtered_df, by):
+                mismatches += 1
+                print(f"Mismatch for {selection} by {by}")
+    print(f"{len(cube['cells'])} cells, {mismatches} mismatches")